@@ -0,0 +1,43 @@
+"""Measures the per item overhead of a chain of stateless sections, with and without fusion.
+
+Run from the repository root with::
+
+    python -m benchmarks.bench_fusion
+"""
+import time
+
+import trio
+
+from slurry.sections import Filter, Map, Skip
+from slurry.sections.weld import weld
+
+ITEMS = 50_000
+
+async def produce(count):
+    for i in range(count):
+        yield i
+
+async def run(fuse):
+    async with trio.open_nursery() as nursery:
+        output = weld(
+            nursery,
+            produce(ITEMS),
+            Map(lambda i: i + 1),
+            Filter(lambda i: i % 3),
+            Map(lambda i: i * 2),
+            Skip(10),
+            fuse=fuse,
+        )
+        async for _ in output:
+            pass
+
+def main():
+    print(f'{"fuse":<6} {"items/s":>12} {"µs/item":>9}')
+    for fuse in (False, True):
+        start = time.perf_counter()
+        trio.run(run, fuse)
+        elapsed = time.perf_counter() - start
+        print(f'{str(fuse):<6} {ITEMS / elapsed:>12.0f} {elapsed / ITEMS * 1e6:>9.2f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""Measures ProcessSection throughput for different message sizes, with and without batching, and
+with shared memory transfer of large messages.
+
+Run from the repository root with::
+
+    python -m benchmarks.bench_process
+"""
+import time
+
+import trio
+
+from slurry import Pipeline
+from slurry.environments import ProcessSection
+
+# (message size in bytes, number of messages)
+WORKLOADS = ((16, 20_000), (1024, 20_000), (1024 * 1024, 200))
+BATCH_SIZES = (1, 64)
+
+SHARED_MEMORY_SIZE = 16 * 1024 * 1024
+
+class Echo(ProcessSection):
+    def __init__(self, batch_size, in_flight, shared_memory_size=0):
+        self.batch_size = batch_size
+        self.shared_memory_size = shared_memory_size
+        self.max_input_in_flight = in_flight
+        self.max_output_in_flight = in_flight
+
+    def refine(self, input, output):
+        for item in input:
+            output(item)
+
+async def run(size, count, batch_size, shared_memory_size=0):
+    payloads = [bytes([i]) * size for i in range(8)]
+
+    async def produce():
+        for i in range(count):
+            yield payloads[i % len(payloads)]
+
+    in_flight = 4 if size < 1024 * 1024 else 2
+    async with Pipeline.create(produce(), Echo(batch_size, in_flight, shared_memory_size)) as pipeline, \
+            pipeline.tap() as aiter:
+        async for _ in aiter:
+            pass
+
+def main():
+    print(f'{"size":>8} {"batch":>6} {"shm":>4} {"items/s":>10} {"MB/s":>8}')
+    for size, count in WORKLOADS:
+        for batch_size in BATCH_SIZES:
+            if size >= 1024 * 1024 and batch_size > 1:
+                batch_size = 4
+            for shared_memory_size in (0, SHARED_MEMORY_SIZE) if size >= 1024 * 1024 else (0,):
+                start = time.perf_counter()
+                trio.run(run, size, count, batch_size, shared_memory_size)
+                elapsed = time.perf_counter() - start
+                print(f'{size:>8} {batch_size:>6} {"yes" if shared_memory_size else "no":>4} '
+                      f'{count / elapsed:>10.0f} {size * count / elapsed / 1e6:>8.1f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""Measures the time to run a short lived pipeline with a ProcessSection, when a new process is
+started for each pipeline, and when a warm worker is borrowed from a WorkerPool.
+
+Run from the repository root with::
+
+    python -m benchmarks.bench_startup
+"""
+import time
+
+import trio
+
+from slurry import Pipeline
+from slurry.environments import ProcessSection, WorkerPool
+
+RUNS = 20
+PRELOAD = ('json', 'decimal', 'email.parser')
+
+class Echo(ProcessSection):
+    def __init__(self, worker_pool=None):
+        self.worker_pool = worker_pool
+
+    def refine(self, input, output):
+        for item in input:
+            output(item)
+
+async def run(worker_pool):
+    async def produce():
+        for i in range(10):
+            yield i
+
+    async with Pipeline.create(produce(), Echo(worker_pool)) as pipeline, pipeline.tap() as aiter:
+        async for _ in aiter:
+            pass
+
+def measure(worker_pool=None):
+    start = time.perf_counter()
+    for _ in range(RUNS):
+        trio.run(run, worker_pool)
+    return (time.perf_counter() - start) / RUNS
+
+def main():
+    print(f'{"mode":<24} {"ms/pipeline":>12} {"startup ms":>11}')
+    print(f'{"new process":<24} {measure() * 1000:>12.2f} {"":>11}')
+    for start_method in ('fork', 'forkserver', 'spawn'):
+        with WorkerPool(1, start_method=start_method, preload=PRELOAD) as pool:
+            elapsed = measure(pool)
+            startup = pool.statistics()['startup_latency']['mean']
+        print(f'{"pool (" + start_method + ")":<24} {elapsed * 1000:>12.2f} {startup * 1000:>11.2f}')
+
+if __name__ == '__main__':
+    main()
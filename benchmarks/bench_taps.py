@@ -0,0 +1,84 @@
+"""Compares pipeline fan-out throughput and peak task count for the per-item task design
+and the persistent per-tap sender task design.
+
+Run from the repository root with::
+
+    python -m benchmarks.bench_taps
+"""
+import math
+import time
+
+import trio
+
+from slurry import Pipeline
+from slurry._tap import Tap
+from slurry._utils import safe_aclose, safe_aclosing
+from slurry.sections.weld import weld
+
+ITEMS = 20_000
+TAP_COUNTS = (1, 4, 32)
+
+class TaskCounter(trio.abc.Instrument):
+    """Tracks the number of live tasks and the peak number of live tasks."""
+    def __init__(self):
+        self.live = 0
+        self.peak = 0
+
+    def task_spawned(self, task):
+        self.live += 1
+        self.peak = max(self.peak, self.live)
+
+    def task_exited(self, task):
+        self.live -= 1
+
+class LegacyPipeline(Pipeline):
+    """Pipeline using the previous fan-out design, which starts one task per item per tap."""
+    async def _pump(self):
+        await self._enabled.wait()
+        async with trio.open_nursery() as nursery:
+            output = weld(nursery, *self.sections)
+            async with safe_aclosing(output) as aiter:
+                async for item in aiter:
+                    self._taps = tuple(filter(lambda tap: not tap.closed, self._taps))
+                    if not self._taps:
+                        break
+                    for tap in self._taps:
+                        nursery.start_soon(tap.send, item)
+        for tap in self._taps:
+            await safe_aclose(tap.send_channel)
+
+    def tap(self, *, max_buffer_size=0, timeout=math.inf, retrys=0, queue_size=1, start=True):
+        send_channel, receive_channel = trio.open_memory_channel(max_buffer_size)
+        self._taps = (*self._taps, Tap(send_channel, timeout, retrys))
+        if start:
+            self._enabled.set()
+        return receive_channel
+
+async def produce(count):
+    for i in range(count):
+        yield i
+
+async def run(pipeline_class, tap_count):
+    async def consume(aiter):
+        async with aiter:
+            async for _ in aiter:
+                pass
+
+    async with pipeline_class.create(produce(ITEMS)) as pipeline:
+        taps = [pipeline.tap() for _ in range(tap_count)]
+        async with trio.open_nursery() as nursery:
+            for aiter in taps:
+                nursery.start_soon(consume, aiter)
+
+def main():
+    print(f'{"design":<10} {"taps":>5} {"items/s":>12} {"peak tasks":>11}')
+    for tap_count in TAP_COUNTS:
+        for name, pipeline_class in (('legacy', LegacyPipeline), ('sender', Pipeline)):
+            counter = TaskCounter()
+            start = time.perf_counter()
+            trio.run(run, pipeline_class, tap_count, instruments=[counter])
+            elapsed = time.perf_counter() - start
+            print(f'{name:<10} {tap_count:>5} {ITEMS / elapsed:>12.0f} {counter.peak:>11}')
+
+if __name__ == '__main__':
+    main()
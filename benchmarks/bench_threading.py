@@ -0,0 +1,44 @@
+"""Compares ThreadSection throughput with the per item bridge and the chunked bridge.
+
+Run from the repository root with::
+
+    python -m benchmarks.bench_threading
+"""
+import time
+
+import trio
+
+from slurry import Pipeline
+from slurry.environments import ThreadSection
+
+ITEMS = 50_000
+CHUNK_SIZES = (1, 16, 256)
+
+class Increment(ThreadSection):
+    def __init__(self, chunk_size):
+        self.chunk_size = chunk_size
+
+    def refine(self, input, output):
+        for item in input:
+            output(item + 1)
+
+async def run(chunk_size):
+    async def produce():
+        for i in range(ITEMS):
+            yield i
+
+    async with Pipeline.create(produce(), Increment(chunk_size)) as pipeline, \
+            pipeline.tap() as aiter:
+        async for _ in aiter:
+            pass
+
+def main():
+    print(f'{"chunk":>6} {"items/s":>10}')
+    for chunk_size in CHUNK_SIZES:
+        start = time.perf_counter()
+        trio.run(run, chunk_size)
+        elapsed = time.perf_counter() - start
+        print(f'{chunk_size:>6} {ITEMS / elapsed:>10.0f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Compares throughput and allocation volume of Window with tuple output and with view output.
+
+Each window is consumed by summing its last ten items, and then dropped. Windows are short lived,
+so peak memory hides the cost of allocating a new window for each item. Instead, the size of each
+window sent by the section is measured with ``sys.getsizeof`` as it is consumed, and summed over
+the run. For views, the size of the weak reference that the ring keeps to each view is included.
+Measuring slows down the run, so throughput is measured in a separate run.
+
+Run from the repository root with::
+
+    python -m benchmarks.bench_window
+"""
+import sys
+import time
+import weakref
+
+import trio
+
+from slurry import Pipeline
+from slurry.sections import Map, Window, WindowView
+
+ITEMS = 10_000
+WINDOW_SIZES = (16, 256, 4096)
+MODES = (
+    ('tuple', {}),
+    ('view', {'view': True}),
+    ('array', {'view': True, 'typecode': 'd'}),
+)
+WEAKREF_SIZE = sys.getsizeof(weakref.ref(Window))
+
+def allocated(window) -> int:
+    """Returns the number of bytes allocated by Window, to send the window."""
+    if isinstance(window, WindowView):
+        return sys.getsizeof(window) + WEAKREF_SIZE
+    return sys.getsizeof(window)
+
+async def run(size, options, measure=False):
+    total = 0
+
+    def consume(window):
+        nonlocal total
+        if measure:
+            total += allocated(window)
+        return sum(window[-10:])
+
+    async def produce():
+        for i in range(ITEMS):
+            yield float(i)
+
+    async with Pipeline.create(
+        produce(), Window(size, **options), Map(consume)
+    ) as pipeline, pipeline.tap() as aiter:
+        async for _ in aiter:
+            pass
+    return total
+
+def main():
+    print(f'{"size":>6} {"mode":>6} {"items/s":>10} {"alloc KiB":>10} {"B/item":>8}')
+    for size in WINDOW_SIZES:
+        for mode, options in MODES:
+            start = time.perf_counter()
+            trio.run(run, size, options)
+            elapsed = time.perf_counter() - start
+
+            total = trio.run(run, size, options, True)
+            print(f'{size:>6} {mode:>6} {ITEMS / elapsed:>10.0f} {total / 1024:>10.0f} '
+                  f'{total / ITEMS:>8.0f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+"""Measures Zip throughput with many high rate sources.
+
+Run from the repository root with::
+
+    python -m benchmarks.bench_zip
+"""
+import time
+
+import trio
+
+from slurry import Pipeline
+from slurry.sections import Zip
+
+ITEMS = 200_000
+SOURCE_COUNTS = (2, 10, 100)
+
+async def run(source_count):
+    async def produce():
+        for i in range(ITEMS // source_count):
+            yield i
+
+    async with Pipeline.create(
+        Zip(*(produce() for _ in range(source_count)))
+    ) as pipeline, pipeline.tap() as aiter:
+        async for _ in aiter:
+            pass
+
+def main():
+    print(f'{"sources":>8} {"tuples/s":>10} {"items/s":>10}')
+    for source_count in SOURCE_COUNTS:
+        start = time.perf_counter()
+        trio.run(run, source_count)
+        elapsed = time.perf_counter() - start
+        tuples = ITEMS // source_count
+        print(f'{source_count:>8} {tuples / elapsed:>10.0f} {tuples * source_count / elapsed:>10.0f}')
+
+if __name__ == '__main__':
+    main()
@@ -2,3 +2,4 @@
 __version__ = '1.3.1'
 
 from ._pipeline import Pipeline as Pipeline
+from ._metrics import PipelineMetrics as PipelineMetrics
@@ -0,0 +1,178 @@
+"""Optional runtime metrics for pipeline sections."""
+import math
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, List, Optional, Tuple
+
+import trio
+
+from ._utils import safe_aclose
+
+class Histogram:
+    """Histogram with exponentially growing buckets, suitable for recording latencies.
+
+    Bucket ``0`` counts values below ``base``. Bucket ``i`` counts values in the range
+    ``[base * 2**(i-1), base * 2**i)``. The last bucket also counts all larger values.
+
+    :param base: Upper bound of the first bucket, in seconds. (default: 1 µs)
+    :type base: float
+    :param buckets: Number of buckets.
+    :type buckets: int
+    """
+    def __init__(self, base: float = 1e-6, buckets: int = 32):
+        self.base = base
+        self.counts = [0] * buckets
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def record(self, value: float):
+        """Adds a value to the histogram."""
+        index = math.frexp(value / self.base)[1] if value >= self.base else 0
+        self.counts[min(index, len(self.counts) - 1)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """Returns the upper bound of the bucket containing the ``q`` quantile."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return min(self.base * 2**i, self.max)
+        return self.max
+
+    def snapshot(self) -> dict:
+        """Returns a dictionary with summary statistics and the non-empty buckets, as a list of
+        ``(upper_bound, count)`` pairs."""
+        return {
+            'count': self.count,
+            'mean': self.sum / self.count if self.count else 0.0,
+            'max': self.max,
+            'p50': self.quantile(0.5),
+            'p99': self.quantile(0.99),
+            'buckets': [(self.base * 2**i, count) for i, count in enumerate(self.counts) if count],
+        }
+
+class SectionMetrics:
+    """Runtime metrics for a single pipeline section.
+
+    Fields:
+
+    * ``name``: Name of the section class.
+    * ``items_in``: Number of items received from the input.
+    * ``items_out``: Number of items sent to the output.
+    * ``input_wait``: Total seconds spent waiting for input (starvation).
+    * ``output_blocked``: Total seconds spent waiting for downstream to accept output (backpressure).
+    * ``latency``: :class:`Histogram` of the time spent processing each input item, excluding time
+      blocked on output.
+    * ``max_queue_depth``: Highest number of items observed in the output channel buffer.
+    """
+    def __init__(self, name: str):
+        self.name = name
+        self.items_in = 0
+        self.items_out = 0
+        self.input_wait = 0.0
+        self.output_blocked = 0.0
+        self.latency = Histogram()
+        self.max_queue_depth = 0
+        self._channel: Optional[trio.MemorySendChannel] = None
+        self._item_started: Optional[float] = None
+        self._item_blocked = 0.0
+
+    def instrument(
+            self,
+            input: Optional[AsyncIterable[Any]],
+            send: Callable[[Any], Awaitable[None]],
+            channel: trio.MemorySendChannel
+    ) -> Tuple[Optional[AsyncIterable[Any]], Callable[[Any], Awaitable[None]]]:
+        """Wraps a section input and output with metering versions.
+
+        :param input: The section input.
+        :param send: The callable used to send output.
+        :param channel: The channel that connects the section to the next section.
+        """
+        self._channel = channel
+        if input is not None:
+            input = _MeteredInput(input, self)
+
+        async def output(item):
+            start = trio.current_time()
+            await send(item)
+            blocked = trio.current_time() - start
+            self.output_blocked += blocked
+            self._item_blocked += blocked
+            self.items_out += 1
+            depth = channel.statistics().current_buffer_used
+            if depth > self.max_queue_depth:
+                self.max_queue_depth = depth
+
+        return input, output
+
+    async def receive(self, aiter: AsyncIterator[Any]) -> Any:
+        """Receives the next item from an input iterator, while recording the time spent
+        waiting, and the processing time of the previous item."""
+        now = trio.current_time()
+        if self._item_started is not None:
+            self.latency.record(now - self._item_started - self._item_blocked)
+            self._item_started = None
+        try:
+            item = await aiter.__anext__()
+        finally:
+            received = trio.current_time()
+            self.input_wait += received - now
+        self.items_in += 1
+        self._item_started = received
+        self._item_blocked = 0.0
+        return item
+
+    def snapshot(self) -> dict:
+        """Returns the current metrics as a dictionary."""
+        snapshot = {
+            'name': self.name,
+            'items_in': self.items_in,
+            'items_out': self.items_out,
+            'input_wait': self.input_wait,
+            'output_blocked': self.output_blocked,
+            'latency': self.latency.snapshot(),
+            'max_queue_depth': self.max_queue_depth,
+        }
+        if self._channel is not None:
+            statistics = self._channel.statistics()
+            snapshot['queue_depth'] = statistics.current_buffer_used
+            snapshot['queue_size'] = statistics.max_buffer_size
+        return snapshot
+
+class PipelineMetrics:
+    """Collects :class:`SectionMetrics` for the sections welded by
+    :func:`weld <slurry.sections.weld.weld>`."""
+    def __init__(self):
+        self.sections: List[SectionMetrics] = []
+
+    def add_section(self, name: str) -> SectionMetrics:
+        """Creates and registers metrics for a section."""
+        section_metrics = SectionMetrics(name)
+        self.sections.append(section_metrics)
+        return section_metrics
+
+    def snapshot(self) -> List[dict]:
+        """Returns a list of section metric snapshots, in pipeline order."""
+        return [section.snapshot() for section in self.sections]
+
+class _MeteredInput:
+    """Async iterator wrapper that measures input wait and per item processing time."""
+    def __init__(self, source: AsyncIterable[Any], metrics: SectionMetrics):
+        self._aiter = source.__aiter__()
+        self._metrics = metrics
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self._metrics.receive(self._aiter)
+
+    async def aclose(self):
+        await safe_aclose(self._aiter)
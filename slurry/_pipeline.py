@@ -1,15 +1,17 @@
 """Contains the main Slurry ``Pipeline`` class."""
 
 import math
+import weakref
 from contextlib import asynccontextmanager
-from typing import Any, AsyncGenerator
+from typing import Any, AsyncGenerator, Optional
 
 import trio
 
 from .sections.abc import PipelineSection
-from .sections.weld import weld
+from .sections.weld import Transport, weld
+from ._metrics import PipelineMetrics
 from ._tap import Tap
-from ._utils import safe_aclose, safe_aclosing
+from ._utils import safe_aclosing
 
 class Pipeline:
     """The main Slurry ``Pipeline`` class.
@@ -26,22 +28,37 @@ class Pipeline:
     """
     def __init__(self, *sections: PipelineSection,
                  nursery: trio.Nursery,
-                 enabled: trio.Event):
+                 enabled: trio.Event,
+                 metrics: Optional[PipelineMetrics] = None,
+                 transport: Optional[Transport] = None):
         self.sections = sections
         self.nursery = nursery
         self._enabled = enabled
-        self._taps = set()
+        self._metrics = metrics
+        self._transport = transport
+        self._taps = ()
+        self._tap_index = weakref.WeakKeyDictionary()
 
     @classmethod
     @asynccontextmanager
-    async def create(cls, *sections: PipelineSection) -> AsyncGenerator["Pipeline", None]:
+    async def create(cls, *sections: PipelineSection,
+                     metrics: bool = False,
+                     transport: Optional[Transport] = None) -> AsyncGenerator["Pipeline", None]:
         """Creates a new pipeline context and adds the given section sequence to it.
 
         :param PipelineSection \\*sections: One or more
           :mod:`PipelineSection <slurry.sections.weld>` compatible objects.
+        :param bool metrics: Record runtime metrics for each section. See :meth:`metrics`.
+          (default: ``False``)
+        :param transport: Buffering and batching used between sections, unless a section
+          has its own transport. See :class:`Transport <slurry.sections.weld.Transport>`.
+          (default: unbuffered, no batching)
+        :type transport: Optional[Transport]
         """
         async with trio.open_nursery() as nursery:
-            pipeline = cls(*sections, nursery=nursery, enabled=trio.Event())
+            pipeline = cls(*sections, nursery=nursery, enabled=trio.Event(),
+                           metrics=PipelineMetrics() if metrics else None,
+                           transport=transport)
             nursery.start_soon(pipeline._pump) # pylint: disable=protected-access
             yield pipeline
             nursery.cancel_scope.cancel()
@@ -51,32 +68,42 @@ class Pipeline:
         await self._enabled.wait()
 
         async with trio.open_nursery() as nursery:
-            output = weld(nursery, *self.sections)
+            output = weld(nursery, *self.sections, metrics=self._metrics, transport=self._transport)
 
             # Output to taps
             async with safe_aclosing(output) as aiter:
                 async for item in aiter:
-                    self._taps = set(filter(lambda tap: not tap.closed, self._taps))
                     if not self._taps:
                         # Hmm.. Debatable. Should closing all taps close the pipeline?
                         break
                     for tap in self._taps:
-                        nursery.start_soon(tap.send, item)
+                        await tap.put(item)
 
         # There is no more output to send. Close the taps.
         for tap in self._taps:
-            await safe_aclose(tap.send_channel)
+            tap.close()
+
+    def _remove_tap(self, tap: Tap):
+        """Called by a tap sender task, when the consumer has closed the tap."""
+        self._taps = tuple(t for t in self._taps if t is not tap)
 
     def tap(self, *,
             max_buffer_size: int = 0,
             timeout: float = math.inf,
             retrys: int = 0,
+            queue_size: int = 1,
+            overflow: str = 'block',
             start: bool = True) -> trio.MemoryReceiveChannel[Any]:
         # pylint: disable=line-too-long
         """Create a new output channel for this pipeline.
 
         Multiple channels can be opened and will receive a copy of the output data.
 
+        Each tap is served by a single sender task, which is fed from a bounded queue. What
+        happens when the queue is full is decided by the ``overflow`` policy. By default, the
+        pipeline waits for the consumer to catch up. Consumers that only care about recent
+        items, can use one of the dropping policies, so they never hold up the other taps.
+
         If all open taps are closed, the immidiate upstream section or iterable will be closed as well, and no
         further items can be sent, from that point on.
 
@@ -94,34 +121,85 @@ class Pipeline:
         :param retrys: Number of times to retry sending, if the initial attempt fails.
             (default ``0``)
         :type retrys: int
+        :param queue_size: Number of items that can be queued for this tap, while waiting for
+            the consumer. (default ``1``)
+        :type queue_size: int
+        :param overflow: Policy used when the queue is full. Options: ``'block'`` (default) \\|
+            ``'drop_oldest'`` \\| ``'drop_newest'`` \\| ``'latest'``. With a dropping policy, items
+            that time out are discarded instead of raising ``trio.BusyResourceError``.
+        :type overflow: str
         :param start: Start processesing when opening this tap. (default ``True``)
         :type start: bool
 
         :return: A trio ``MemoryReceiveChannel`` from which pipeline output can be pulled.
         """
         send_channel, receive_channel = trio.open_memory_channel(max_buffer_size)
-        self._taps.add(Tap(send_channel, timeout, retrys))
+        tap = Tap(send_channel, timeout, retrys, queue_size, overflow)
+        self._taps = (*self._taps, tap)
+        self._tap_index[receive_channel] = tap
+        self.nursery.start_soon(tap.run, self._remove_tap)
         if start:
             self._enabled.set()
         return receive_channel
 
-    def extend(self, *sections: PipelineSection, start: bool = False) -> "Pipeline":
+    def dropped(self, tap: trio.MemoryReceiveChannel[Any]) -> int:
+        """Returns the number of items that have been discarded by the overflow policy of a tap.
+
+        :param tap: A channel returned by :meth:`tap`.
+        :type tap: trio.MemoryReceiveChannel[Any]
+        """
+        return self._tap_index[tap].dropped
+
+    def metrics(self) -> dict:
+        """Returns a snapshot of the runtime metrics of the pipeline.
+
+        The snapshot is a dictionary with two keys. ``'sections'`` is a list with an entry per
+        section, in pipeline order, containing:
+
+        * ``name``: Name of the section class.
+        * ``items_in`` and ``items_out``: Number of items received and sent.
+        * ``input_wait``: Seconds spent waiting for input. A large value means the section is starved
+          by upstream.
+        * ``output_blocked``: Seconds spent waiting for downstream to receive output. A large value
+          means the section is held back by backpressure.
+        * ``latency``: Histogram of the processing time per input item, excluding time blocked on
+          output, with ``count``, ``mean``, ``max``, ``p50``, ``p99`` and ``buckets``.
+        * ``queue_depth``, ``queue_size`` and ``max_queue_depth``: Current, maximum and highest
+          observed occupancy of the channel between the section and the next.
+
+        ``'taps'`` is a list with the number of ``queued`` and ``dropped`` items for each open tap.
+
+        :raises RuntimeError: If the pipeline was created without ``metrics=True``.
+        """
+        if self._metrics is None:
+            raise RuntimeError('Metrics are not enabled for this pipeline.')
+        return {
+            'sections': self._metrics.snapshot(),
+            'taps': [{'queued': tap.queued, 'dropped': tap.dropped} for tap in self._taps],
+        }
+
+    def extend(self, *sections: PipelineSection, start: bool = False,
+               metrics: bool = False) -> "Pipeline":
         """Extend this pipeline into a new pipeline.
 
         An extension will add a tap to the existing pipeline and use this tap as input to the
         newly added pipeline.
 
         Extensions can be added dynamically during runtime. The data feed
-        will start at the current position. Old events won't be replayed.
+        will start at the current position. Old events won't be replayed. The extension uses the
+        same transport as this pipeline.
 
         :param PipelineSection \\*sections: One or more pipeline sections.
         :param bool start: Start processing when adding this extension. (default: ``False``)
+        :param bool metrics: Record runtime metrics for the extension. (default: ``False``)
         """
         pipeline = Pipeline(
             self.tap(start=start),
             sections,
             nursery=self.nursery,
-            enabled=self._enabled
+            enabled=self._enabled,
+            metrics=PipelineMetrics() if metrics else None,
+            transport=self._transport
         )
         self.nursery.start_soon(pipeline._pump) # pylint: disable=protected-access
         return pipeline
@@ -1,11 +1,27 @@
 """Pipeline output tap."""
+from collections import deque
+
 import trio
 
+OVERFLOW_POLICIES = ('block', 'drop_oldest', 'drop_newest', 'latest')
+
 class Tap:
     """The tap class is responsible for transmitting the output of the pipeline to consumers.
-    It implements an asynchronous send function that is launched as a task from the pipeline for
-    each item processed. Each tap can be individually configured with send timeouts and retry
-    attempts.
+    Each tap owns a small bounded queue, which is fed by the pipeline, and a long lived sender
+    task, which drains the queue and transmits items to the consumer. Each tap can be individually
+    configured with send timeouts, retry attempts and an overflow policy.
+
+    The overflow policy decides what happens when the pipeline produces items faster than the
+    consumer can receive them, and the queue is full:
+
+    * ``'block'``: The pipeline waits until there is room in the queue.
+    * ``'drop_oldest'``: The oldest queued item is discarded to make room for the new item.
+    * ``'drop_newest'``: The new item is discarded.
+    * ``'latest'``: Only the most recent item is kept. Equivalent to ``'drop_oldest'`` with
+      a queue size of one.
+
+    With any policy other than ``'block'``, an item that cannot be sent within the
+    configured timeout and retries is discarded, instead of raising an error.
 
     .. Note::
         This class should not be instantiated by client applications. Create a tap by calling
@@ -17,19 +33,87 @@ class Tap:
     :type timeout: float
     :param retrys: Number of times to reattempt a send that timed out.
     :type retrys: int
+    :param queue_size: Number of items that can be queued for the sender task.
+    :type queue_size: int
+    :param overflow: Policy used when the queue is full.
+    :type overflow: str
     """
-    def __init__(self, send_channel, timeout, retrys):
+    def __init__(self, send_channel, timeout, retrys, queue_size=1, overflow='block'):
         self.send_channel = send_channel
         self.timeout = timeout
         self.retrys = retrys
+        self.overflow = _validate_overflow(overflow)
+        self.queue_size = 1 if overflow == 'latest' else queue_size
+        if self.queue_size < 1:
+            raise ValueError(f'Invalid queue_size argument: {queue_size}')
         self.closed = False
+        self.dropped = 0
+        self._queue = deque()
+        self._eof = False
+        self._not_empty = trio.lowlevel.ParkingLot()
+        self._not_full = trio.lowlevel.ParkingLot()
+
+    @property
+    def queued(self) -> int:
+        """Number of items currently waiting in the queue."""
+        return len(self._queue)
+
+    async def put(self, item):
+        """Queues an item for transmission by the sender task.
+
+        If the queue is full, the overflow policy decides whether to wait, or which item to
+        discard. Items put on a closed tap are silently discarded.
+
+        :param item: The item to send.
+        :type item: Any
+        """
+        while len(self._queue) >= self.queue_size and not self.closed:
+            if self.overflow == 'block':
+                await self._not_full.park()
+            elif self.overflow == 'drop_newest':
+                self.dropped += 1
+                return
+            else:
+                self._queue.popleft()
+                self.dropped += 1
+        if self.closed:
+            return
+        self._queue.append(item)
+        self._not_empty.unpark()
+
+    def close(self):
+        """Signals that no more items will be put on the tap. The sender task will transmit
+        any remaining queued items, and then close the consumer channel."""
+        self._eof = True
+        self._not_empty.unpark()
+
+    async def run(self, on_close=None):
+        """Runs the sender task, which transmits queued items until the tap is closed by the
+        pipeline, or the consumer closes the receiving end of the tap.
+
+        :param on_close: Optional callback, called with the tap as argument, when the
+            consumer has closed the tap.
+        :type on_close: Optional[Callable[[Tap], None]]
+        """
+        with self.send_channel:
+            while True:
+                while not self._queue:
+                    if self._eof:
+                        return
+                    await self._not_empty.park()
+                item = self._queue.popleft()
+                self._not_full.unpark()
+                await self.send(item)
+                if self.closed:
+                    self._queue.clear()
+                    self._not_full.unpark_all()
+                    if on_close is not None:
+                        on_close(self)
+                    return
 
     async def send(self, item):
         """Handles the transmission of a single item from the pipeline.
 
-        Each send operation is run as a task, so that in case of multiple consumers, a stuck
-        consumer won't block the entire send loop.
-
         :param item: The item to send.
         :type item: Any
         """
@@ -41,4 +125,15 @@ class Tap:
                     self.closed = True
                 return
             await trio.sleep(0)
+        if self.overflow != 'block':
+            self.dropped += 1
+            return
         raise trio.BusyResourceError('Unable to send item.')
+
+def _validate_overflow(overflow):
+    if isinstance(overflow, str):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f'Invalid overflow argument: {overflow}')
+    else:
+        raise TypeError('overflow argument has invalid type.')
+    return overflow
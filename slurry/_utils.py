@@ -1,8 +1,11 @@
 from typing import (
+    Any,
     AsyncGenerator,
     AsyncIterable,
     AsyncIterator,
     Awaitable,
+    Callable,
+    Optional,
     Protocol,
     TypeVar,
     Union,
@@ -11,6 +14,8 @@ from typing import (
 
 from contextlib import asynccontextmanager
 
+import trio
+
 _T_co = TypeVar("_T_co", covariant=True)
 
 @asynccontextmanager
@@ -28,6 +33,127 @@ async def safe_aclose(obj: AsyncIterator[_T_co]) -> None:
     if isinstance(obj, _SupportsAclose):
         await obj.aclose()
 
+async def collect_batches(input: AsyncIterable[Any],
+                          send_channel: trio.MemorySendChannel,
+                          batch_size: int,
+                          batch_latency: float):
+    """Collects items from an async iterable into lists of up to ``batch_size`` items, and sends
+    them to a channel."""
+    async with send_channel, trio.open_nursery() as nursery:
+        item_send, item_receive = trio.open_memory_channel(batch_size)
+
+        async def pull_task():
+            async with item_send:
+                async for item in input:
+                    await item_send.send(item)
+
+        nursery.start_soon(pull_task)
+        async for item in item_receive:
+            batch = [item]
+            try:
+                while len(batch) < batch_size:
+                    batch.append(item_receive.receive_nowait())
+            except (trio.WouldBlock, trio.EndOfChannel):
+                pass
+            if len(batch) < batch_size and batch_latency > 0:
+                with trio.move_on_after(batch_latency):
+                    try:
+                        while len(batch) < batch_size:
+                            batch.append(await item_receive.receive())
+                    except trio.EndOfChannel:
+                        pass
+            await send_channel.send(batch)
+
+class ConcurrentMapper:
+    """Applies an async function to the items of an async iterable, with up to ``limit`` items
+    pending at a time, and sends the results to an output.
+
+    An item is pending from the time it is received from the input, until its result has been
+    accepted by the output. When ``limit`` items are pending, no more input is received, so
+    backpressure propagates upstream. If ``ordered`` is ``True``, results are sent in input order,
+    and completed results wait in a reorder buffer, until all earlier results have been sent.
+    Otherwise results are sent in completion order.
+
+    :param func: Async function applied to each item.
+    :type func: Callable[[Any], Awaitable[Any]]
+    :param limit: Maximum number of pending items.
+    :type limit: int
+    :param ordered: Send results in input order.
+    :type ordered: bool
+
+    Fields:
+
+    * ``pending``: Number of pending items.
+    * ``in_flight``: Number of items currently being processed by ``func``.
+    * ``completed``: Number of results waiting to be sent to the output.
+    """
+    def __init__(self, func: Callable[[Any], Awaitable[Any]], limit: int, ordered: bool = True):
+        if limit < 1:
+            raise ValueError(f'Invalid limit: {limit}')
+        self.func = func
+        self.limit = limit
+        self.ordered = ordered
+        self.pending = 0
+        self.in_flight = 0
+        self.completed = 0
+
+    async def run(self, input: AsyncIterable[Any], output: Callable[[Any], Awaitable[None]]):
+        """Maps the input to the output, until the input is exhausted, and all results have been
+        sent."""
+        window = trio.Semaphore(self.limit)
+        send_channel, receive_channel = trio.open_memory_channel(self.limit)
+
+        async def apply(item, slot: Optional[_Slot]):
+            self.in_flight += 1
+            try:
+                result = await self.func(item)
+            finally:
+                self.in_flight -= 1
+            self.completed += 1
+            if slot is None:
+                send_channel.send_nowait(result)
+            else:
+                slot.set(result)
+
+        async def dispatch():
+            async with send_channel, safe_aclosing(input) as aiter, \
+                    trio.open_nursery() as workers:
+                async for item in aiter:
+                    await window.acquire()
+                    self.pending += 1
+                    if self.ordered:
+                        slot = _Slot()
+                        send_channel.send_nowait(slot)
+                        workers.start_soon(apply, item, slot)
+                    else:
+                        workers.start_soon(apply, item, None)
+
+        async with trio.open_nursery() as nursery:
+            nursery.start_soon(dispatch)
+            async for result in receive_channel:
+                if self.ordered:
+                    result = await result.wait()
+                self.completed -= 1
+                await output(result)
+                self.pending -= 1
+                window.release()
+
+class _Slot:
+    """Holds the result of an item in the reorder buffer."""
+    __slots__ = ('_event', '_result')
+
+    def __init__(self):
+        self._event = trio.Event()
+        self._result = None
+
+    def set(self, result):
+        self._result = result
+        self._event.set()
+
+    async def wait(self):
+        await self._event.wait()
+        return self._result
+
 @runtime_checkable
 class _SupportsAclose(Protocol):
     def aclose(self) -> Awaitable[object]:
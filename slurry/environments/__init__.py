@@ -1,3 +1,4 @@
 from ._trio import TrioSection as TrioSection
-from ._threading import ThreadSection as ThreadSection
-from ._multiprocessing import ProcessSection as ProcessSection
+from ._threading import ThreadSection as ThreadSection, ThreadPoolSection as ThreadPoolSection
+from ._multiprocessing import ProcessSection as ProcessSection, ProcessPoolSection as ProcessPoolSection
+from ._worker_pool import WorkerPool as WorkerPool
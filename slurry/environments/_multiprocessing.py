@@ -1,11 +1,22 @@
 """Implements a section that runs in an independent python proces."""
 
-from multiprocessing import Process, SimpleQueue
-from typing import Any, AsyncIterable, Awaitable, Callable, Optional
+import math
+import multiprocessing
+import multiprocessing.connection
+import os
+import threading
+import time
+from multiprocessing import Process, Semaphore, SimpleQueue
+from typing import TYPE_CHECKING, Any, AsyncIterable, Awaitable, Callable, List, Optional
 
 import trio
 
+from .._utils import collect_batches as _collect_batches
 from ..sections.abc import SyncSection
+from ._shared_memory import SharedMemoryRing
+
+if TYPE_CHECKING:
+    from ._worker_pool import WorkerPool
 
 class ProcessSection(SyncSection):
     """ProcessSection defines a section interface with a synchronous
@@ -17,8 +28,32 @@ class ProcessSection(SyncSection):
     .. note::
         ``ProcessSection`` implementations must be `pickleable
         <https://docs.python.org/3/library/pickle.html#what-can-be-pickled-and-unpickled>`_.
+
+    Fields:
+
+    * ``max_input_in_flight``: Maximum number of messages sent to the process, that have not yet
+      been received by ``refine``. (default: ``1``)
+    * ``max_output_in_flight``: Maximum number of messages output by ``refine``, that have not yet
+      been received by the next section. (default: ``1``)
+    * ``batch_size``: Maximum number of items transferred in a single message. (default: ``1``)
+    * ``batch_latency``: Maximum time in seconds an item is held back, waiting for a batch to
+      fill up. (default: ``0.001``)
+    * ``shared_memory_size``: Size in bytes of a shared memory ring buffer used for each direction
+      of transfer, or ``0`` to disable shared memory transfer. (default: ``0``)
+    * ``shared_memory_threshold``: Minimum size in bytes of a buffer, that is transferred through
+      shared memory. (default: ``65536``)
+    * ``worker_pool``: A :class:`WorkerPool` of warm worker processes to run ``refine`` in, instead
+      of starting a new process each time the section is pumped. (default: ``None``)
     """
 
+    max_input_in_flight: int = 1
+    max_output_in_flight: int = 1
+    batch_size: int = 1
+    batch_latency: float = 0.001
+    shared_memory_size: int = 0
+    shared_memory_threshold: int = 64 * 1024
+    worker_pool: Optional['WorkerPool'] = None
+
     async def pump(self, input: Optional[AsyncIterable[Any]], output: Callable[[Any], Awaitable[None]]):
         """
         The ``ProcessSection`` pump method works similar to the threaded version, however
@@ -28,37 +63,384 @@ class ProcessSection(SyncSection):
 
         * Data that is to be sent to the input or transmitted on the output must be `pickleable
           <https://docs.python.org/3/library/pickle.html#what-can-be-pickled-and-unpickled>`_.
-        * Since ``ProcessSection`` uses unbounded queues to transfer data behind the scenes, they
-          are unable to provide or receive backpressure.
+        * Items are transferred through queues, with credit based flow control in each direction.
+          The number of messages in transit is limited by ``max_input_in_flight`` and
+          ``max_output_in_flight``. When a limit is reached, the sending side waits, so backpressure
+          propagates across the process boundary, like it does between other sections.
+        * Each message carries a batch of up to ``batch_size`` items. Items that are available
+          immediately are batched together. Otherwise, a batch is sent when it is full, or when
+          ``batch_latency`` has passed. Batching amortizes the cost of pickling and transferring
+          small items. With batching, up to ``batch_size`` times the in flight limit items can be
+          in transit.
+        * Each direction is served by a single dedicated thread in the parent process.
+        * If a ``worker_pool`` is set, ``refine`` runs in a warm worker process borrowed from the
+          pool, which avoids the cost of starting a process, and importing modules, for each
+          pipeline. The shared memory settings of the pool apply, instead of those of the section.
+        * If ``shared_memory_size`` is set, large buffers, like the contents of ``bytes``,
+          ``bytearray`` and ``memoryview`` objects, or arrays that support pickle protocol 5 out of
+          band buffers, are copied into a shared memory ring buffer, instead of being pickled and
+          sent through a pipe. Only the location of the buffers is sent through the queue. The
+          receiving side copies the buffers out of the ring, and immediately releases the space.
         """
-        if input:
-            input_queue = SimpleQueue()
-        else:
-            input_queue = None
-        output_queue = SimpleQueue()
-        process = Process(target=self._process_run_target,
-                          args=(input_queue, output_queue))
-
-        async def sender():
-            async for item in input:
-                await trio.to_thread.run_sync(input_queue.put, (item,))
-            await trio.to_thread.run_sync(input_queue.put, ())
-
-        async with trio.open_nursery() as nursery:
-            if input:
-                nursery.start_soon(sender)
-            process.start()
+        job = await self._open_job(bool(input), False)
+        try:
+            connection = job.connection
+            async with trio.open_nursery() as nursery:
+                input_scope = trio.CancelScope()
+                if input:
+                    batch_send, batch_receive = trio.open_memory_channel(0)
+
+                    async def collect():
+                        with input_scope:
+                            await _collect_batches(input, batch_send,
+                                                   self.batch_size, self.batch_latency)
+
+                    nursery.start_soon(collect)
+                    nursery.start_soon(connection.run_writer, batch_receive)
+                job.start()
+                output_send, output_receive = trio.open_memory_channel(0)
+                nursery.start_soon(connection.run_reader, output_send)
+                async with output_receive:
+                    async for batch in output_receive:
+                        for item in batch:
+                            await output(item)
+                        connection.output_credits.release()
+                # Refine has returned. The child discards any remaining input, once the writer
+                # has sent the end of input sentinel.
+                input_scope.cancel()
+            await job.finish()
+        finally:
+            job.close()
+
+    async def _open_job(self, has_input: bool, tagged: bool) -> '_Job':
+        """Prepares a process to run refine in, either a new child process, or a worker borrowed
+        from the worker pool."""
+        if self.worker_pool is not None:
+            return await self.worker_pool._open_job(self, has_input, tagged)
+        return _Job(self, has_input, tagged)
+
+class ProcessPoolSection(ProcessSection):
+    """ProcessPoolSection runs the same synchronous
+    :meth:`refine <slurry.sections.abc.SyncSection.refine>` method in a pool of worker
+    processes, to spread CPU bound work across multiple cores.
+
+    Each input item is sent to one of the workers. Output items are attributed to the input item
+    most recently received by ``refine``, which makes it possible to output the results in the
+    same order as the input. ``refine`` is therefore expected to process its input one item at a
+    time.
+
+    ``ProcessPoolSection`` supports the same transport options as :class:`ProcessSection`, which
+    apply to each worker. It can not be used as a first section.
+
+    Fields:
+
+    * ``workers``: Number of worker processes. (default: number of CPUs)
+    * ``ordered``: If ``True`` (default), output is sent in input order, using a reorder buffer.
+      Otherwise output is sent as soon as it arrives from any worker, for the lowest latency.
+    * ``distribution``: How input items are distributed to workers. ``'round_robin'`` (default)
+      or ``'least_loaded'``, which picks the worker with fewest unfinished items.
+    * ``max_pending``: Maximum number of items that have been sent to the workers, but not
+      completed, or when ordered, not yet output. (default: four times the number of workers)
+    """
+
+    workers: int = os.cpu_count() or 1
+    ordered: bool = True
+    distribution: str = 'round_robin'
+    max_pending: Optional[int] = None
+
+    async def pump(self, input: Optional[AsyncIterable[Any]], output: Callable[[Any], Awaitable[None]]):
+        """Distributes input to the worker processes and merges their output."""
+        if input is None:
+            raise RuntimeError('ProcessPoolSection requires an input.')
+        if self.distribution not in ('round_robin', 'least_loaded'):
+            raise ValueError(f'Invalid distribution: {self.distribution}')
+
+        jobs = []
+        try:
+            for _ in range(self.workers):
+                jobs.append(await self._open_job(True, True))
+        except BaseException:
+            for job in jobs:
+                job.close()
+            raise
+        connections = [job.connection for job in jobs]
+        pending = trio.Semaphore(self.max_pending or 4 * self.workers)
+        outstanding = [0] * self.workers
+        item_channels = [trio.open_memory_channel(0) for _ in connections]
+
+        async def dispatch():
+            item_sends = [item_send for item_send, _ in item_channels]
+            try:
+                seq = 0
+                async for item in input:
+                    await pending.acquire()
+                    if self.distribution == 'least_loaded':
+                        index = min(range(self.workers), key=outstanding.__getitem__)
+                    else:
+                        index = seq % self.workers
+                    outstanding[index] += 1
+                    await item_sends[index].send((seq, item))
+                    seq += 1
+            finally:
+                for item_send in item_sends:
+                    item_send.close()
+
+        try:
+            async with trio.open_nursery() as nursery:
+                merged_send, merged_receive = trio.open_memory_channel(0)
+                async with merged_send:
+                    for index, connection in enumerate(connections):
+                        batch_send, batch_receive = trio.open_memory_channel(0)
+                        nursery.start_soon(_collect_batches, item_channels[index][1], batch_send,
+                                           self.batch_size, self.batch_latency)
+                        nursery.start_soon(connection.run_writer, batch_receive)
+                        nursery.start_soon(connection.run_reader, merged_send.clone(), index)
+                for job in jobs:
+                    job.start()
+                nursery.start_soon(dispatch)
+
+                next_seq = 0
+                done = set()
+                buffered = {}
+                async with merged_receive:
+                    async for index, batch in merged_receive:
+                        for entry in batch:
+                            if len(entry) == 1:
+                                outstanding[index] -= 1
+                                if not self.ordered:
+                                    pending.release()
+                                    continue
+                                done.add(entry[0])
+                                while next_seq in done:
+                                    done.remove(next_seq)
+                                    next_seq += 1
+                                    pending.release()
+                                    for item in buffered.pop(next_seq, ()):
+                                        await output(item)
+                            else:
+                                seq, item = entry
+                                if not self.ordered or seq is None or seq == next_seq:
+                                    await output(item)
+                                else:
+                                    buffered.setdefault(seq, []).append(item)
+                        connections[index].output_credits.release()
+            for job in jobs:
+                await job.finish()
+        finally:
+            for job in jobs:
+                job.close()
+
+class _Job:
+    """Runs the refine method of a section in a new child process."""
+    def __init__(self, section: ProcessSection, has_input: bool, tagged: bool):
+        self.connection = _Connection(section.max_input_in_flight, section.max_output_in_flight,
+                                      section.shared_memory_size, section.shared_memory_threshold)
+        self._process = Process(target=_run_child,
+                                args=(section, *self.connection.args, has_input, tagged))
+
+    def start(self):
+        """Starts running refine."""
+        self._process.start()
+
+    async def finish(self):
+        """Waits for the child process to exit, after refine has returned."""
+        await trio.to_thread.run_sync(self._process.join)
+
+    def close(self):
+        """Terminates the child process, if it is still running, unblocks transport threads that
+        may still be waiting for it, and releases resources."""
+        if self._process.is_alive():
+            self._process.terminate()
+        self.connection.unblock()
+        self.connection.close()
+
+class _Connection:
+    """The queues and flow control credits connecting the parent process with a child process,
+    and the parent side threads that move batches between them and the Trio event loop."""
+    def __init__(self, input_credits: int, output_credits: int,
+                 shared_memory_size: int = 0, shared_memory_threshold: int = 0,
+                 context=multiprocessing):
+        self.input_queue = context.SimpleQueue()
+        self.input_credits = context.Semaphore(input_credits)
+        self.output_queue = context.SimpleQueue()
+        self.output_credits = context.Semaphore(output_credits)
+        self.input_ring = self.output_ring = None
+        if shared_memory_size:
+            self.input_ring = SharedMemoryRing(shared_memory_size, shared_memory_threshold, context)
+            self.output_ring = SharedMemoryRing(shared_memory_size, shared_memory_threshold, context)
+        # Only used in the parent. A child that is terminated while putting a batch on the output
+        # queue can leave the queue locked, so waiting threads are not woken through the queue.
+        self._wakeup_receive, self._wakeup_send = multiprocessing.Pipe(duplex=False)
+
+    @property
+    def args(self):
+        """Arguments passed to the child process."""
+        return (self.input_queue, self.output_queue, self.input_credits, self.output_credits,
+                self.input_ring, self.output_ring)
+
+    def receive(self) -> Any:
+        """Gets a message from the output queue. Returns ``None``, if the connection has been
+        unblocked."""
+        # pylint: disable=protected-access
+        ready = multiprocessing.connection.wait([self.output_queue._reader, self._wakeup_receive])
+        if self._wakeup_receive in ready:
+            return None
+        return self.output_queue.get()
+
+    def unblock(self):
+        """Wakes up threads, that may still be waiting for a child process, that has exited or
+        been terminated."""
+        self.input_credits.release()
+        self._wakeup_send.send(None)
+
+    def close(self):
+        """Removes the shared memory rings, if any."""
+        for ring in (self.input_ring, self.output_ring):
+            if ring is not None:
+                ring.close()
+
+    async def run_writer(self, batches: trio.MemoryReceiveChannel):
+        """Puts batches on the input queue, followed by a ``None`` sentinel."""
+        def writer():
             while True:
-                wrapped_item = await trio.to_thread.run_sync(output_queue.get)
-                if wrapped_item == ():
+                try:
+                    batch = trio.from_thread.run(batches.receive)
+                except trio.EndOfChannel:
                     break
-                await output(wrapped_item[0])
-            nursery.cancel_scope.cancel()
-
-    def _process_run_target(self, input_queue: SimpleQueue, output_queue: SimpleQueue):
-        if input_queue:
-            input = (wrapped_item[0] for wrapped_item in iter(input_queue.get, ()))
-        else:
-            input = None
-        self.refine(input, lambda item: output_queue.put((item,)))
-        output_queue.put(())
+                self.input_credits.acquire()
+                if self.input_ring is not None:
+                    batch = self.input_ring.encode(batch)
+                self.input_queue.put(batch)
+            self.input_queue.put(None)
+        await _run_transport_thread(writer)
+
+    async def run_reader(self, batches: trio.MemorySendChannel, index: Optional[int] = None):
+        """Sends batches from the output queue to a channel, until the ``None`` sentinel is
+        received. If an index is given, ``(index, batch)`` tuples are sent instead."""
+        def reader():
+            for batch in iter(self.receive, None):
+                if self.output_ring is not None:
+                    batch = self.output_ring.decode(batch)
+                trio.from_thread.run(batches.send, batch if index is None else (index, batch))
+            trio.from_thread.run_sync(batches.close)
+        await _run_transport_thread(reader)
+
+async def _run_transport_thread(func: Callable[[], None]):
+    """Runs a transport thread, that lives as long as its connection. The thread gets a dedicated
+    capacity limiter, so long running transport threads never hold tokens of Trio's default thread
+    limiter, which would starve other sections, and deadlock with more than 20 connections."""
+    await trio.to_thread.run_sync(func, abandon_on_cancel=True, limiter=trio.CapacityLimiter(1))
+
+def _run_child(section: ProcessSection,
+               input_queue: SimpleQueue, output_queue: SimpleQueue,
+               input_credits: Semaphore, output_credits: Semaphore,
+               input_ring: Optional[SharedMemoryRing], output_ring: Optional[SharedMemoryRing],
+               has_input: bool, tagged: bool):
+    """Runs the refine method of a section in the child process.
+
+    If ``tagged`` is ``True``, input items are ``(seq, item)`` tuples. Each output item is then sent
+    as ``(seq, item)``, where seq is the sequence number of the input item being processed, or
+    ``None`` after the input is exhausted. A ``(seq,)`` marker is sent as soon as refine requests
+    the next input item, or returns.
+
+    After refine has returned, any remaining input is discarded, up to the end of input sentinel,
+    leaving the queues empty.
+    """
+    writer = _BatchWriter(output_queue, output_credits, section.batch_size, section.batch_latency,
+                          output_ring)
+    current = None
+    exhausted = not has_input
+
+    def batches():
+        nonlocal exhausted
+        while not exhausted:
+            if writer.pending and input_queue.empty():
+                writer.flush()
+            batch = input_queue.get()
+            if batch is None:
+                exhausted = True
+                return
+            input_credits.release()
+            yield batch if input_ring is None else input_ring.decode(batch)
+
+    def tagged_input():
+        nonlocal current
+        for batch in batches():
+            for seq, item in batch:
+                current = seq
+                yield item
+                # Refine asks for the next item, so it is done with the current one. The marker is
+                # flushed by batches(), before it blocks waiting for more input.
+                writer.put((current,))
+                current = None
+
+    if not has_input:
+        section.refine(None, writer.put)
+    elif tagged:
+        section.refine(tagged_input(), lambda item: writer.put((current, item)))
+        if current is not None:
+            writer.put((current,))
+    else:
+        section.refine((item for batch in batches() for item in batch), writer.put)
+    writer.close()
+    for _ in batches():
+        pass
+
+class _BatchWriter:
+    """Collects output items from a synchronous refine method into batches, and puts them on a
+    queue, when the batch is full, or the oldest item has waited for ``batch_latency`` seconds.
+    A ``None`` sentinel is put on the queue, when the writer is closed. If a shared memory ring is
+    given, batches are encoded with it."""
+    def __init__(self, queue: SimpleQueue, credits: Semaphore, batch_size: int, batch_latency: float,
+                 ring: Optional[SharedMemoryRing] = None):
+        self._queue = queue
+        self._ring = ring
+        self._credits = credits
+        self._batch_size = batch_size
+        self._batch_latency = batch_latency
+        self._batch: List[Any] = []
+        self._deadline = math.inf
+        self._closed = False
+        self._lock = threading.Condition()
+        self._send_lock = threading.Lock()
+        if batch_size > 1:
+            threading.Thread(target=self._run_timer, daemon=True).start()
+
+    @property
+    def pending(self) -> bool:
+        """``True`` if there are items waiting to be sent."""
+        return bool(self._batch)
+
+    def put(self, item):
+        with self._lock:
+            if not self._batch:
+                self._deadline = time.monotonic() + self._batch_latency
+                self._lock.notify()
+            self._batch.append(item)
+            if len(self._batch) < self._batch_size:
+                return
+        self.flush()
+
+    def flush(self):
+        with self._send_lock:
+            with self._lock:
+                batch, self._batch = self._batch, []
+            if batch:
+                self._credits.acquire()
+                self._queue.put(batch if self._ring is None else self._ring.encode(batch))
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self._closed = True
+            self._lock.notify()
+        self._queue.put(None)
+
+    def _run_timer(self):
+        while True:
+            with self._lock:
+                while not self._closed and (not self._batch or time.monotonic() < self._deadline):
+                    self._lock.wait(self._deadline - time.monotonic() if self._batch else None)
+                if self._closed:
+                    return
+            self.flush()
@@ -0,0 +1,185 @@
+"""Out of band transfer of large buffers between processes, through shared memory."""
+
+import io
+import multiprocessing
+import pickle
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Dict, List, Optional, Tuple
+
+class SharedMemoryRing:
+    """A ring buffer in shared memory, that carries the large buffers of messages sent in one
+    direction between two processes.
+
+    Messages are serialized with pickle protocol 5. Buffers of at least ``threshold`` bytes, such as
+    the contents of ``bytes``, ``bytearray`` and ``memoryview`` objects, or arrays that support out
+    of band pickling, are copied into the ring, and only their offset and length is sent along with
+    the pickled message. The receiver copies each buffer out of the ring, and releases the space
+    back to the sender, before the message is unpickled.
+
+    Space is allocated and released in FIFO order, so the sender only needs to track how many
+    bytes it has produced, and the receiver how many bytes it has consumed. If a buffer does not
+    fit in the free space of the ring, the sender waits for the receiver to release space. Buffers
+    that could never fit are pickled in band.
+
+    :param size: Size of the ring in bytes.
+    :type size: int
+    :param threshold: Minimum size in bytes of a buffer that is transferred through the ring.
+    :type threshold: int
+    :param context: The multiprocessing context used to create synchronization primitives.
+    """
+    def __init__(self, size: int, threshold: int, context=multiprocessing):
+        if size < 1:
+            raise ValueError(f'Invalid shared memory size: {size}')
+        self.size = size
+        self.threshold = threshold
+        self._shm = SharedMemory(create=True, size=size)
+        self._released = context.Condition()
+        self._consumed = context.Value('Q', 0, lock=False)
+        self._produced = 0
+
+    def encode(self, obj: Any) -> Any:
+        """Prepares an object to be put on a queue. Returns the object itself, if it contains no
+        large buffers."""
+        pickler = _Pickler(self)
+        pickler.dump(obj)
+        if not pickler.buffers:
+            return obj
+        return _SharedMemoryMessage(pickler.data.getvalue(), pickler.buffers, pickler.out_of_band,
+                                    pickler.reserved)
+
+    def decode(self, message: Any) -> Any:
+        """Restores an object received from a queue, and releases its space in the ring."""
+        if not isinstance(message, _SharedMemoryMessage):
+            return message
+        copies = [bytearray(self._shm.buf[offset:offset + size]) for offset, size in message.buffers]
+        with self._released:
+            self._consumed.value += message.reserved
+            self._released.notify_all()
+        return _Unpickler(message.data, copies, message.out_of_band).load()
+
+    def close(self):
+        """Closes and removes the shared memory. Only called by the process that created it."""
+        self._shm.close()
+        self._shm.unlink()
+
+    def _store(self, raw: memoryview, reserved: int) -> Optional[Tuple[int, int, int]]:
+        """Copies a buffer into the ring. Returns ``(offset, size, allocated)``, or ``None`` if the
+        buffer is too small, or the space already reserved for the message does not leave room for
+        it."""
+        size = raw.nbytes
+        if size < self.threshold:
+            return None
+        offset = self._produced % self.size
+        skip = self.size - offset if offset + size > self.size else 0
+        allocated = skip + size
+        if reserved + allocated > self.size:
+            return None
+        with self._released:
+            while self._produced + allocated - self._consumed.value > self.size:
+                self._released.wait()
+        self._produced += allocated
+        offset = (offset + skip) % self.size
+        self._shm.buf[offset:offset + size] = raw
+        return offset, size, allocated
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_shm'] = self._shm.name
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._shm = SharedMemory(name=state['_shm'])
+
+class _SharedMemoryMessage:
+    """A pickled message, with the location of its buffers in the ring, and the indices of the
+    buffers that are pickle protocol 5 out of band buffers."""
+    __slots__ = ('data', 'buffers', 'out_of_band', 'reserved')
+
+    def __init__(self, data: bytes, buffers: List[Tuple[int, int]], out_of_band: List[int],
+                 reserved: int):
+        self.data = data
+        self.buffers = buffers
+        self.out_of_band = out_of_band
+        self.reserved = reserved
+
+    def __reduce__(self):
+        return _SharedMemoryMessage, (self.data, self.buffers, self.out_of_band, self.reserved)
+
+class _Pickler(pickle.Pickler):
+    """Pickler that places large buffers in a ring. ``bytes``, ``bytearray`` and ``memoryview``
+    objects are handled as persistent ids, since pickle does not call reducers for them. Other
+    objects that support out of band pickling, are handled by the buffer callback."""
+    def __init__(self, ring: SharedMemoryRing):
+        self.data = io.BytesIO()
+        super().__init__(self.data, protocol=5, buffer_callback=self._buffer_callback)
+        self.ring = ring
+        self.buffers: List[Tuple[int, int]] = []
+        self.out_of_band: List[int] = []
+        self.reserved = 0
+        self._stored: Dict[int, Any] = {}
+
+    def persistent_id(self, obj):
+        kind = type(obj)
+        if kind is not bytes and kind is not bytearray and kind is not memoryview:
+            return None
+        if id(obj) in self._stored:
+            return self._stored[id(obj)]
+        pid = None
+        if kind is memoryview:
+            if obj.c_contiguous:
+                index = self._store(obj.cast('B') if obj.format != 'B' or obj.ndim != 1 else obj)
+                if index is not None:
+                    pid = (index, obj.format, obj.shape, obj.readonly)
+        else:
+            index = self._store(memoryview(obj))
+            if index is not None:
+                pid = (index, kind.__name__)
+        self._stored[id(obj)] = pid
+        return pid
+
+    def _buffer_callback(self, buffer: pickle.PickleBuffer) -> bool:
+        try:
+            raw = buffer.raw()
+        except BufferError:
+            return True
+        index = self._store(raw)
+        if index is None:
+            return True
+        self.out_of_band.append(index)
+        return False
+
+    def _store(self, raw: memoryview) -> Optional[int]:
+        stored = self.ring._store(raw, self.reserved)
+        if stored is None:
+            return None
+        offset, size, allocated = stored
+        self.buffers.append((offset, size))
+        self.reserved += allocated
+        return len(self.buffers) - 1
+
+class _Unpickler(pickle.Unpickler):
+    """Unpickler that restores objects from buffers copied out of the ring."""
+    def __init__(self, data: bytes, copies: List[bytearray], out_of_band: List[int]):
+        super().__init__(io.BytesIO(data), buffers=[copies[index] for index in out_of_band])
+        self._copies = copies
+        self._loaded: Dict[int, Any] = {}
+
+    def persistent_load(self, pid):
+        index = pid[0]
+        if index in self._loaded:
+            return self._loaded[index]
+        copy = self._copies[index]
+        if pid[1] == 'bytes':
+            obj = bytes(copy)
+        elif pid[1] == 'bytearray':
+            obj = copy
+        else:
+            _, format, shape, readonly = pid
+            obj = memoryview(copy)
+            if format != 'B' or len(shape) != 1:
+                obj = obj.cast(format, shape)
+            if readonly:
+                obj = obj.toreadonly()
+        self._loaded[index] = obj
+        return obj
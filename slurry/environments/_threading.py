@@ -1,16 +1,30 @@
 """The threading module implements a synchronous section that runs in a background thread."""
-from typing import Any, AsyncIterable, Awaitable, Callable, Optional
+import threading
+from abc import abstractmethod
+from typing import Any, AsyncIterable, Awaitable, Callable, List, Optional
 
 import trio
 
-from ..sections.abc import SyncSection
+from .._utils import ConcurrentMapper, collect_batches
+from ..sections.abc import Section, SyncSection
 
 
 class ThreadSection(SyncSection):
     """ThreadSection defines a section interface which uses a synchronous
     :meth:`refine <slurry.sections.abc.SyncSection.refine>` method.
+
+    Fields:
+
+    * ``chunk_size``: Maximum number of items moved between the Trio event loop and the
+      thread in one round trip. With the default of ``1``, each item is bridged individually.
+      (default: ``1``)
+    * ``flush_latency``: Maximum time in seconds an item is held back, waiting for a chunk to
+      fill up. (default: ``0.001``)
     """
 
+    chunk_size: int = 1
+    flush_latency: float = 0.001
+
     async def pump(self,
                    input: Optional[AsyncIterable[Any]],
                    output: Callable[[Any], Awaitable[None]]):
@@ -18,11 +32,21 @@ class ThreadSection(SyncSection):
         wrappers, which transparently bridges the input and outputs between the parent
         trio event loop and the sync world.
 
+        If ``chunk_size`` is larger than one, input is prefetched into chunks by a task in the
+        event loop, and the thread fetches a whole chunk at a time. Output is collected into
+        chunks, which are sent when full, when ``refine`` requests more input, or when the oldest
+        item has waited for ``flush_latency`` seconds. This reduces the number of round trips
+        between the thread and the event loop, at the cost of up to two chunks of items being
+        held in transit.
+
         .. note::
             Trio has a limit on how many threads can run simultaneously. See the
             `trio documentation <https://trio.readthedocs.io/en/stable/reference-core.html#trio-s-philosophy-about-managing-worker-threads>`_
             for more information.
         """
+        if self.chunk_size > 1:
+            await self._pump_chunked(input, output)
+            return
 
         def sync_input():
             """Wrapper for turning an async iterable into a blocking generator."""
@@ -38,3 +62,135 @@ class ThreadSection(SyncSection):
         await trio.to_thread.run_sync(self.refine,
                                       sync_input(),
                                       lambda item: trio.from_thread.run(output, item))
+
+    async def _pump_chunked(self,
+                            input: Optional[AsyncIterable[Any]],
+                            output: Callable[[Any], Awaitable[None]]):
+        """Pumps the refine method, bridging input and output in chunks."""
+        token = trio.lowlevel.current_trio_token()
+        output_lock = trio.Lock()
+        chunk: List[Any] = []
+        chunk_lock = threading.Lock()
+        chunk_started = trio.Event()
+
+        async def flush():
+            nonlocal chunk
+            async with output_lock:
+                with chunk_lock:
+                    items, chunk = chunk, []
+                for item in items:
+                    await output(item)
+
+        async def flusher():
+            nonlocal chunk_started
+            while True:
+                await chunk_started.wait()
+                chunk_started = trio.Event()
+                await trio.sleep(self.flush_latency)
+                await flush()
+
+        def put(item):
+            with chunk_lock:
+                chunk.append(item)
+                size = len(chunk)
+            if size == 1:
+                token.run_sync_soon(lambda: chunk_started.set())
+            if size >= self.chunk_size:
+                trio.from_thread.run(flush)
+
+        chunk_send, chunk_receive = trio.open_memory_channel(1)
+
+        async def receive_chunk():
+            await flush()
+            try:
+                return await chunk_receive.receive()
+            except trio.EndOfChannel:
+                return None
+
+        def sync_input():
+            """Blocking generator that fetches input a chunk at a time."""
+            if input is None:
+                return
+            while True:
+                items = trio.from_thread.run(receive_chunk)
+                if items is None:
+                    return
+                yield from items
+
+        async with trio.open_nursery() as nursery:
+            if input is not None:
+                nursery.start_soon(collect_batches, input, chunk_send,
+                                   self.chunk_size, self.flush_latency)
+            nursery.start_soon(flusher)
+            await trio.to_thread.run_sync(self.refine, sync_input(), put)
+            await flush()
+            nursery.cancel_scope.cancel()
+
+
+class ThreadPoolSection(Section):
+    """ThreadPoolSection applies a synchronous, possibly blocking, :meth:`apply` method to each
+    input item, using a bounded set of worker threads. This is useful for blocking per item work,
+    like calls to legacy database drivers, or filesystem operations, where many items can be in
+    progress at once.
+
+    Worker threads are borrowed with :func:`trio.to_thread.run_sync`, using a dedicated
+    :class:`trio.CapacityLimiter` per pump, so the section never uses more than ``max_workers``
+    threads, independently of the global Trio thread limit. ``ThreadPoolSection`` can not be used
+    as a first section.
+
+    Fields:
+
+    * ``max_workers``: Maximum number of items processed in parallel. (default: ``8``)
+    * ``max_pending``: Maximum number of items received from the input, that have not yet been
+      sent to the output, including items waiting for a worker thread, and results waiting in the
+      reorder buffer. (default: twice ``max_workers``)
+    * ``ordered``: If ``True`` (default), results are sent in input order. Otherwise results are
+      sent in completion order, for the lowest latency.
+    """
+
+    max_workers: int = 8
+    max_pending: Optional[int] = None
+    ordered: bool = True
+
+    _limiter: Optional[trio.CapacityLimiter] = None
+    _mapper: Optional[ConcurrentMapper] = None
+
+    @abstractmethod
+    def apply(self, item: Any) -> Any:
+        """Processes a single item in a worker thread, and returns the result.
+
+        :param item: The input item.
+        :type item: Any
+        """
+
+    @property
+    def in_flight(self) -> int:
+        """Number of items currently being processed in a worker thread."""
+        return self._limiter.borrowed_tokens if self._limiter is not None else 0
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of items waiting for a worker thread."""
+        return self._limiter.statistics().tasks_waiting if self._limiter is not None else 0
+
+    @property
+    def pending(self) -> int:
+        """Number of items received from the input, that have not yet been sent to the output."""
+        return self._mapper.pending if self._mapper is not None else 0
+
+    async def pump(self,
+                   input: Optional[AsyncIterable[Any]],
+                   output: Callable[[Any], Awaitable[None]]):
+        """Applies :meth:`apply` to the input items in worker threads, and sends the results to
+        the output."""
+        if input is None:
+            raise RuntimeError('ThreadPoolSection requires an input.')
+        limiter = trio.CapacityLimiter(self.max_workers)
+
+        async def apply(item):
+            return await trio.to_thread.run_sync(self.apply, item, limiter=limiter)
+
+        self._limiter = limiter
+        self._mapper = ConcurrentMapper(apply, self.max_pending or 2 * self.max_workers,
+                                        self.ordered)
+        await self._mapper.run(input, output)
@@ -0,0 +1,249 @@
+"""A pool of warm worker processes, that can be reused by process sections."""
+
+import importlib
+import multiprocessing
+import threading
+import time
+from typing import Any, List, Optional, Sequence
+
+import trio
+
+from .._metrics import Histogram
+from ._multiprocessing import ProcessSection, _Connection, _run_child
+
+_READY = 'ready'
+
+class WorkerPool:
+    """WorkerPool keeps a number of worker processes alive, ready to run the
+    :meth:`refine <slurry.sections.abc.SyncSection.refine>` method of any
+    :class:`ProcessSection`, that has the pool set as its ``worker_pool``. Each time such a section
+    is pumped, a worker is borrowed from the pool, instead of starting a new process. Short lived
+    pipelines therefore do not pay for process startup and module imports.
+
+    A worker runs one section at a time. If no idle worker is available, a new worker is started.
+    When a section is done, its worker is returned to the pool, unless the pool already has
+    ``size`` idle workers. A worker is terminated and replaced, if the section did not finish
+    cleanly, for example because the pipeline was closed before the section had processed all of
+    its input. Sections sent to a worker must be pickleable, whatever start method is used.
+
+    The pool can be used as a context manager, which starts the workers on entry, and closes the
+    pool on exit.
+
+    :param size: Number of idle workers kept alive.
+    :type size: int
+    :param start_method: The multiprocessing start method. ``'fork'``, ``'spawn'`` or
+        ``'forkserver'``. If ``None``, the platform default is used.
+    :type start_method: Optional[str]
+    :param preload: Names of modules that are imported by each worker when it starts. With the
+        ``'forkserver'`` start method, the modules are imported once by the fork server, and
+        inherited by the workers.
+    :type preload: Sequence[str]
+    :param shared_memory_size: Size in bytes of the shared memory rings of each worker. See
+        :class:`ProcessSection`.
+    :type shared_memory_size: int
+    :param shared_memory_threshold: Minimum size in bytes of a buffer, that is transferred through
+        shared memory.
+    :type shared_memory_threshold: int
+    :param reset_timeout: Seconds to wait for a worker to become ready again, after a section has
+        finished.
+    :type reset_timeout: float
+    """
+    def __init__(self,
+                 size: int = 1,
+                 *,
+                 start_method: Optional[str] = None,
+                 preload: Sequence[str] = (),
+                 shared_memory_size: int = 0,
+                 shared_memory_threshold: int = 64 * 1024,
+                 reset_timeout: float = 5.0):
+        if size < 1:
+            raise ValueError(f'Invalid size: {size}')
+        self.size = size
+        self.preload = tuple(preload)
+        self.shared_memory_size = shared_memory_size
+        self.shared_memory_threshold = shared_memory_threshold
+        self.reset_timeout = reset_timeout
+        self._context = multiprocessing.get_context(start_method)
+        if self._context.get_start_method() == 'forkserver' and self.preload:
+            self._context.set_forkserver_preload(list(self.preload))
+        self._idle: List[_Worker] = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self._started = 0
+        self._replaced = 0
+        self._busy = 0
+        self._startup_latency = Histogram()
+
+    def start(self):
+        """Starts workers until the pool has ``size`` idle workers. Workers start in the background.
+        This method is called automatically when the pool is first used."""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError('WorkerPool is closed.')
+            while len(self._idle) < self.size:
+                self._idle.append(self._start_worker())
+
+    def close(self):
+        """Stops the idle workers. Workers that are in use are stopped, when their section is
+        done."""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.stop()
+
+    def statistics(self) -> dict:
+        """Returns a dictionary with the number of ``idle`` and ``busy`` workers, the total number
+        of workers ``started``, the number of workers ``replaced`` after a section did not finish
+        cleanly, and a snapshot of the ``startup_latency`` :class:`Histogram
+        <slurry._metrics.Histogram>`, which measures the time from starting a worker until it is
+        ready to run a section, including the time spent importing preloaded modules."""
+        with self._lock:
+            return {
+                'idle': len(self._idle),
+                'busy': self._busy,
+                'started': self._started,
+                'replaced': self._replaced,
+                'startup_latency': self._startup_latency.snapshot(),
+            }
+
+    def __reduce__(self):
+        # Sections are sent to workers with the pool still attached. Workers have no use for it.
+        return _no_pool, ()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    async def _open_job(self, section: ProcessSection, has_input: bool, tagged: bool) -> '_PooledJob':
+        """Borrows a worker, and waits for it to be ready."""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError('WorkerPool is closed.')
+            if not self._started:
+                while len(self._idle) < self.size:
+                    self._idle.append(self._start_worker())
+            worker = self._idle.pop() if self._idle else self._start_worker()
+            self._busy += 1
+        job = _PooledJob(self, worker, section, has_input, tagged)
+        if not worker.ready:
+            try:
+                latency = await trio.to_thread.run_sync(worker.wait_ready, abandon_on_cancel=True)
+            except BaseException:
+                job.close()
+                raise
+            with self._lock:
+                self._startup_latency.record(latency)
+        return job
+
+    def _start_worker(self) -> '_Worker':
+        self._started += 1
+        return _Worker(self)
+
+    def _release(self, worker: '_Worker', clean: bool):
+        with self._lock:
+            self._busy -= 1
+            if not clean:
+                self._replaced += 1
+            elif not self._closed and len(self._idle) < self.size:
+                self._idle.append(worker)
+                return
+        if clean:
+            worker.stop()
+        else:
+            worker.terminate()
+
+class _Worker:
+    """A worker process, with its job queue and the connection used by all jobs."""
+    def __init__(self, pool: WorkerPool):
+        context = pool._context
+        self.connection = _Connection(0, 0, pool.shared_memory_size, pool.shared_memory_threshold,
+                                      context)
+        self.job_queue = context.SimpleQueue()
+        self.ready = False
+        # Wall clock time is comparable between processes, so the worker can measure its own
+        # startup latency.
+        self._process = context.Process(target=_run_worker,
+                                        args=(time.time(), pool.preload, self.job_queue,
+                                              *self.connection.args),
+                                        daemon=True)
+        self._process.start()
+
+    def wait_ready(self) -> float:
+        """Waits for the worker to signal that it is ready, and returns the time it took from
+        starting the worker until it was ready, as measured by the worker."""
+        message = self.connection.receive()
+        if not isinstance(message, tuple) or message[0] != _READY:
+            raise RuntimeError('Unexpected message from worker.')
+        self.ready = True
+        return message[1]
+
+    def stop(self):
+        """Asks the worker to exit."""
+        self.job_queue.put(None)
+        self.connection.close()
+
+    def terminate(self):
+        """Terminates the worker, and unblocks threads that may still be waiting for it."""
+        if self._process.is_alive():
+            self._process.terminate()
+        self.connection.unblock()
+        self.connection.close()
+
+class _PooledJob:
+    """Runs the refine method of a section in a worker borrowed from a pool."""
+    def __init__(self, pool: WorkerPool, worker: _Worker, section: ProcessSection,
+                 has_input: bool, tagged: bool):
+        self.connection = worker.connection
+        self._pool = pool
+        self._worker = worker
+        self._job = (section, has_input, tagged)
+        self._input_credits = section.max_input_in_flight
+        self._output_credits = section.max_output_in_flight
+        self._finished = False
+        self._closed = False
+
+    def start(self):
+        """Grants the flow control credits of the section, and sends it to the worker."""
+        for _ in range(self._input_credits):
+            self.connection.input_credits.release()
+        for _ in range(self._output_credits):
+            self.connection.output_credits.release()
+        self._worker.job_queue.put(self._job)
+
+    async def finish(self):
+        """Waits for the worker to discard any remaining input and become ready, and takes back
+        the flow control credits."""
+        with trio.move_on_after(self._pool.reset_timeout):
+            message = await trio.to_thread.run_sync(self.connection.receive,
+                                                    abandon_on_cancel=True)
+            self._finished = message == _READY and self._take_credits()
+
+    def close(self):
+        """Returns the worker to the pool, or replaces it, if the job did not finish cleanly."""
+        if not self._closed:
+            self._closed = True
+            self._pool._release(self._worker, self._finished)
+
+    def _take_credits(self) -> bool:
+        credits = ((self.connection.input_credits, self._input_credits),
+                   (self.connection.output_credits, self._output_credits))
+        return all(semaphore.acquire(block=False) for semaphore, count in credits
+                   for _ in range(count))
+
+def _no_pool():
+    return None
+
+def _run_worker(started: float, preload: Sequence[str], job_queue: Any, *connection_args: Any):
+    """Runs jobs in a worker process, until the ``None`` sentinel is received. The first ready
+    message carries the startup latency of the worker."""
+    for module in preload:
+        importlib.import_module(module)
+    output_queue = connection_args[1]
+    output_queue.put((_READY, max(0.0, time.time() - started)))
+    for section, has_input, tagged in iter(job_queue.get, None):
+        _run_child(section, *connection_args, has_input, tagged)
+        output_queue.put(_READY)
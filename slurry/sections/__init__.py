@@ -1,6 +1,6 @@
 """A collection of common stream operations."""
-from ._buffers import Window as Window, Group as Group, Delay as Delay
+from ._buffers import Window as Window, WindowView as WindowView, HoppingWindow as HoppingWindow, TumblingWindow as TumblingWindow, Group as Group, KeyedGroup as KeyedGroup, Delay as Delay
 from ._combiners import Chain as Chain, Merge as Merge, Zip as Zip, ZipLatest as ZipLatest
-from ._filters import Skip as Skip, SkipWhile as SkipWhile, Filter as Filter, Changes as Changes, RateLimit as RateLimit
+from ._filters import Skip as Skip, SkipWhile as SkipWhile, Filter as Filter, Changes as Changes, Distinct as Distinct, RateLimit as RateLimit
 from ._producers import Repeat as Repeat, Metronome as Metronome, InsertValue as InsertValue
-from ._refiners import Map as Map
+from ._refiners import Map as Map, ConcurrentMap as ConcurrentMap, BatchMap as BatchMap
@@ -1,12 +1,20 @@
 """Pipeline sections with age- and volume-based buffers."""
+import array
 from collections import deque
+from collections.abc import Sequence as SequenceABC
+import copy
+import heapq
+import itertools
 import math
-from typing import Any, AsyncIterable, Callable, Optional, Sequence
+import time
+import weakref
+from typing import Any, AsyncIterable, Callable, Hashable, Iterator, Optional, Sequence, Union
 
 import trio
 
 from ..environments import TrioSection
 from .._utils import safe_aclosing
+from .aggregators import Aggregator
 
 class Window(TrioSection):
     """Window buffer with size and age limits.
@@ -23,6 +31,17 @@ class Window(TrioSection):
         All items remain in the buffer, unless they are removed by one of the window
         conditions and any item can be output more than once.
 
+    If an ``aggregate`` factory is given, the window is instead summarized by an
+    :class:`Aggregator <slurry.sections.aggregators.Aggregator>`, that is updated incrementally as
+    items enter and leave the window, and only the aggregate value is output. See
+    :mod:`slurry.sections.aggregators` for the available aggregators.
+
+    If ``view`` is ``True``, items are kept in a preallocated ring buffer, and each output is a
+    read-only :class:`WindowView` of the buffer, instead of a new tuple. The items of a view are
+    only copied, if the view is still referenced when the window overwrites them. If ``typecode``
+    is given, the ring buffer is an :class:`array.array` of that type, which stores numeric items
+    compactly.
+
     :param max_size: The maximum buffer size.
     :type max_size: int
     :param source: Input when used as first section.
@@ -31,15 +50,35 @@ class Window(TrioSection):
     :type max_age: float
     :param min_size: Minimum amount of items in the buffer to trigger an output.
     :type min_size: int
+    :param aggregate: Optional factory, called with no arguments, that returns a new aggregator,
+        for example ``aggregators.Mean``, or ``lambda: aggregators.Associative(math.gcd)``.
+    :type aggregate: Optional[Callable[[], Aggregator]]
+    :param view: Output read-only views of a ring buffer, instead of tuples. Requires a finite
+        ``max_size``.
+    :type view: bool
+    :param typecode: Optional :mod:`array` typecode of the ring buffer, when ``view`` is used.
+    :type typecode: Optional[str]
     """
     def __init__(self, max_size: int, source: Optional[AsyncIterable[Any]] = None, *,
                  max_age: float = math.inf,
-                 min_size: int = 1):
+                 min_size: int = 1,
+                 aggregate: Optional[Callable[[], Aggregator]] = None,
+                 view: bool = False,
+                 typecode: Optional[str] = None):
         super().__init__()
+        if view and aggregate is not None:
+            raise ValueError('view and aggregate can not be used together.')
+        if view and math.isinf(max_size):
+            raise ValueError('view requires a finite max_size.')
+        if typecode is not None and not view:
+            raise ValueError('typecode requires view.')
         self.source = source
         self.max_size = max_size
         self.max_age = max_age
         self.min_size = min_size
+        self.aggregate = aggregate
+        self.view = view
+        self.typecode = typecode
 
     async def refine(self, input, output):
         if input:
@@ -49,16 +88,335 @@ class Window(TrioSection):
         else:
             raise RuntimeError('No input provided.')
 
+        if self.view:
+            await self._refine_view(source, output)
+            return
+
         buf = deque()
+        aggregator = self.aggregate() if self.aggregate is not None else None
 
         async with safe_aclosing(source) as aiter:
             async for item in aiter:
                 now = trio.current_time()
                 buf.append((item, now))
+                if aggregator is not None:
+                    aggregator.add(item)
                 while len(buf) > self.max_size or now - buf[0][1] > self.max_age:
-                    buf.popleft()
+                    oldest, _ = buf.popleft()
+                    if aggregator is not None:
+                        aggregator.remove(oldest)
                 if len(buf) >= self.min_size:
-                    await output(tuple(i[0] for i in buf))
+                    if aggregator is not None:
+                        await output(aggregator.value())
+                    else:
+                        await output(tuple(i[0] for i in buf))
+
+    async def _refine_view(self, source, output):
+        ring = _Ring(self.max_size, self.typecode)
+        async with safe_aclosing(source) as aiter:
+            async for item in aiter:
+                now = trio.current_time()
+                ring.append(item, now)
+                while now - ring.oldest_time() > self.max_age:
+                    ring.popleft()
+                if len(ring) >= self.min_size:
+                    await output(ring.view())
+
+class _Ring:
+    """Preallocated ring buffer holding the items of a window and their arrival times.
+
+    The ring has room for twice the window size, so items that have left the window stay in place
+    for a while, and views of earlier windows remain valid. Positions are absolute item counts.
+    Before a slot is overwritten, any view that is still alive and covers the slot is given a copy
+    of its items."""
+    def __init__(self, size: int, typecode: Optional[str] = None):
+        self.size = size
+        self.capacity = 2 * size
+        if typecode is None:
+            self.items = [None] * self.capacity
+        else:
+            self.items = array.array(typecode, [0]) * self.capacity
+        self.times = [0.0] * self.capacity
+        self.head = 0
+        self.tail = 0
+        self._views = deque()
+
+    def __len__(self):
+        return self.tail - self.head
+
+    def append(self, item, time: float):
+        if self.tail - self.head == self.size:
+            self.head += 1
+        self._retain(self.tail - self.capacity)
+        index = self.tail % self.capacity
+        self.items[index] = item
+        self.times[index] = time
+        self.tail += 1
+
+    def popleft(self):
+        self.head += 1
+
+    def oldest_time(self) -> float:
+        return self.times[self.head % self.capacity]
+
+    def view(self) -> 'WindowView':
+        view = WindowView(self, self.head, self.tail - self.head)
+        self._views.append(weakref.ref(view))
+        return view
+
+    def _retain(self, overwritten: int):
+        """Copies the items of live views that cover the position about to be overwritten."""
+        views = self._views
+        while views:
+            view = views[0]()
+            if view is not None:
+                if view._start > overwritten:
+                    break
+                view._items = view._copy()
+            views.popleft()
+
+class WindowView(SequenceABC):
+    """A read-only sequence view of the items in a :class:`Window`, with the oldest item first.
+
+    The view supports ``len``, indexing, iteration and slicing, without copying the window. Slices
+    with a step of one are themselves views. Views are copied on retain: If a view is still
+    referenced when the window is about to overwrite its items, the items are first copied into the
+    view. Consumers can therefore keep views for as long as they like, but views that are dropped
+    promptly are never copied.
+    """
+    __slots__ = ('_ring', '_start', '_length', '_items', '_base', '_offset', '__weakref__')
+
+    def __init__(self, ring: _Ring, start: int, length: int):
+        self._ring = ring
+        self._start = start
+        self._length = length
+        self._items: Optional[tuple] = None
+        self._base: Optional[WindowView] = None
+        self._offset = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._length)
+            if step == 1:
+                view = WindowView(self._ring, self._start, max(0, stop - start))
+                view._base = self if self._base is None else self._base
+                view._offset = self._offset + start
+                return view
+            return tuple(self._item(i) for i in range(start, stop, step))
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError('WindowView index out of range')
+        return self._item(index)
+
+    def __iter__(self) -> Iterator[Any]:
+        for index in range(self._length):
+            yield self._item(index)
+
+    def __repr__(self):
+        return f'WindowView({self.copy()!r})'
+
+    def copy(self) -> tuple:
+        """Returns the items as a tuple."""
+        base = self if self._base is None else self._base
+        if base._items is not None:
+            return base._items[self._offset:self._offset + self._length]
+        return base._copy(self._offset, self._length)
+
+    def _item(self, index: int) -> Any:
+        base = self if self._base is None else self._base
+        index += self._offset
+        if base._items is not None:
+            return base._items[index]
+        ring = base._ring
+        return ring.items[(base._start + index) % ring.capacity]
+
+    def _copy(self, offset: int = 0, length: Optional[int] = None) -> tuple:
+        if length is None:
+            length = self._length
+        ring = self._ring
+        first = (self._start + offset) % ring.capacity
+        end = first + length
+        if end <= ring.capacity:
+            return tuple(ring.items[first:end])
+        return tuple(ring.items[first:]) + tuple(ring.items[:end - ring.capacity])
+
+class HoppingWindow(TrioSection):
+    """Collects items into fixed size time windows, that start at regular, aligned intervals.
+
+    A new window starts every ``hop`` seconds, at times ``offset + k * hop``, and covers the
+    following ``size`` seconds. If ``hop`` is smaller than ``size``, windows overlap, and each item
+    is added to every window that covers its timestamp. When a window closes, it is sent as a tuple
+    ``(start, end, items)``, with the items in order of arrival. Windows that received no items are
+    not sent.
+
+    By default, windows are based on processing time. Each item is timestamped with ``clock()``
+    when it is received, and windows close when the clock reaches their end. With the default
+    clock, :func:`time.time`, windows are aligned to wall clock boundaries, so for example a
+    ``size`` of ``10`` gives windows starting at every whole ten seconds.
+
+    If a ``timestamp`` function is given, windows are instead based on event time, carried in the
+    items. The section keeps a watermark, which is the highest timestamp seen, minus
+    ``allowed_lateness``. A window closes when the watermark passes its end. Items are not added
+    to windows that are already closed, and the number of such late items is available as
+    ``late_items``. The remaining windows are sent when the input is exhausted.
+
+    Open windows are kept in a heap ordered by their end time, so closing windows does not
+    require scanning all open windows.
+
+    :param size: Length of each window in seconds.
+    :type size: float
+    :param hop: Time in seconds between the start of consecutive windows.
+    :type hop: float
+    :param source: Input when used as first section.
+    :type source: Optional[AsyncIterable[Any]]
+    :param offset: Alignment of window start times.
+    :type offset: float
+    :param timestamp: Optional function that extracts an event timestamp from an item.
+    :type timestamp: Optional[Callable[[Any], float]]
+    :param allowed_lateness: Seconds that windows are kept open after their end time, waiting
+        for items that arrive out of order.
+    :type allowed_lateness: float
+    :param clock: Function returning the current time in seconds, used for processing time.
+    :type clock: Callable[[], float]
+    :param reducer: Optional reducer function used to transform the items of a window to a single
+        value.
+    :type reducer: Optional[Callable[[Sequence[Any]], Any]]
+    """
+    def __init__(self, size: float, hop: float, source: Optional[AsyncIterable[Any]] = None, *,
+                 offset: float = 0.0,
+                 timestamp: Optional[Callable[[Any], float]] = None,
+                 allowed_lateness: float = 0.0,
+                 clock: Callable[[], float] = time.time,
+                 reducer: Optional[Callable[[Sequence[Any]], Any]] = None):
+        super().__init__()
+        if size <= 0:
+            raise ValueError(f'Invalid window size: {size}')
+        if hop <= 0:
+            raise ValueError(f'Invalid window hop: {hop}')
+        if allowed_lateness < 0:
+            raise ValueError(f'Invalid allowed lateness: {allowed_lateness}')
+        self.source = source
+        self.size = size
+        self.hop = hop
+        self.offset = offset
+        self.timestamp = timestamp
+        self.allowed_lateness = allowed_lateness
+        self.clock = clock
+        self.reducer = reducer
+        self.late_items = 0
+
+    async def refine(self, input, output):
+        if input:
+            source = input
+        elif self.source:
+            source = self.source
+        else:
+            raise RuntimeError('No input provided.')
+
+        windows = {}
+        deadlines = []
+        watermark = -math.inf
+
+        async def close_windows(watermark):
+            while deadlines and deadlines[0][0] <= watermark:
+                end, index = heapq.heappop(deadlines)
+                items = windows.pop(index)
+                await output((end - self.size, end, self._process_result(items)))
+
+        async with trio.open_nursery() as nursery:
+            send_channel, receive_channel = trio.open_memory_channel(0)
+            async def pull_task():
+                async with send_channel, safe_aclosing(source) as aiter:
+                    async for item in aiter:
+                        await send_channel.send(item)
+            nursery.start_soon(pull_task)
+
+            while True:
+                received = False
+                with trio.move_on_at(self._next_deadline(deadlines)):
+                    try:
+                        item = await receive_channel.receive()
+                    except trio.EndOfChannel:
+                        break
+                    received = True
+                if self.timestamp is None:
+                    watermark = self.clock() - self.allowed_lateness
+                    if received:
+                        self._add_item(item, self.clock(), watermark, windows, deadlines)
+                elif received:
+                    timestamp = self.timestamp(item)
+                    self._add_item(item, timestamp, watermark, windows, deadlines)
+                    watermark = max(watermark, timestamp - self.allowed_lateness)
+                await close_windows(watermark)
+
+            await close_windows(math.inf)
+
+    def _next_deadline(self, deadlines) -> float:
+        """Returns the trio time at which the earliest processing time window closes."""
+        if self.timestamp is not None or not deadlines:
+            return math.inf
+        return trio.current_time() + deadlines[0][0] + self.allowed_lateness - self.clock()
+
+    def _add_item(self, item, timestamp, watermark, windows, deadlines):
+        index = math.floor((timestamp - self.offset) / self.hop)
+        late = False
+        while True:
+            start = self.offset + index * self.hop
+            end = start + self.size
+            if end <= timestamp:
+                break
+            if start <= timestamp:
+                if end <= watermark:
+                    late = True
+                    break
+                if index not in windows:
+                    windows[index] = []
+                    heapq.heappush(deadlines, (end, index))
+                windows[index].append(item)
+            index -= 1
+        if late:
+            self.late_items += 1
+
+    def _process_result(self, items):
+        if self.reducer is not None:
+            return self.reducer(items)
+        return tuple(items)
+
+class TumblingWindow(HoppingWindow):
+    """Collects items into consecutive, non-overlapping time windows of a fixed size.
+
+    This is a :class:`HoppingWindow`, where ``hop`` equals ``size``, so each item is part of
+    exactly one window.
+
+    :param size: Length of each window in seconds.
+    :type size: float
+    :param source: Input when used as first section.
+    :type source: Optional[AsyncIterable[Any]]
+    :param offset: Alignment of window start times.
+    :type offset: float
+    :param timestamp: Optional function that extracts an event timestamp from an item.
+    :type timestamp: Optional[Callable[[Any], float]]
+    :param allowed_lateness: Seconds that windows are kept open after their end time, waiting
+        for items that arrive out of order.
+    :type allowed_lateness: float
+    :param clock: Function returning the current time in seconds, used for processing time.
+    :type clock: Callable[[], float]
+    :param reducer: Optional reducer function used to transform the items of a window to a single
+        value.
+    :type reducer: Optional[Callable[[Sequence[Any]], Any]]
+    """
+    def __init__(self, size: float, source: Optional[AsyncIterable[Any]] = None, *,
+                 offset: float = 0.0,
+                 timestamp: Optional[Callable[[Any], float]] = None,
+                 allowed_lateness: float = 0.0,
+                 clock: Callable[[], float] = time.time,
+                 reducer: Optional[Callable[[Sequence[Any]], Any]] = None):
+        super().__init__(size, size, source, offset=offset, timestamp=timestamp,
+                         allowed_lateness=allowed_lateness, clock=clock, reducer=reducer)
 
 class Group(TrioSection):
     """Groups received items by time based interval.
@@ -77,6 +435,12 @@ class Group(TrioSection):
     The items in the buffer can optionally be mapped over, by supplying a mapper function and be
     reduced to a single value, by supplying a reducer function.
 
+    For groups that are only reduced to a single value, like a count or a sum, a ``fold`` function
+    can be supplied instead of a reducer. Each item is then combined with an accumulator as it is
+    received, starting from ``initial``, and the final accumulator is sent, instead of the buffer.
+    Items are not stored, so the memory used by a group does not grow with its size. Timer and
+    ``max_size`` behave the same as with a buffer.
+
     :param interval: Time in seconds from when an item arrives until the buffer is sent.
     :type interval: float
     :param source: Input when used as first section.
@@ -88,17 +452,29 @@ class Group(TrioSection):
     :type mapper: Optional[Callable[[Any], Any]]
     :param reducer: Optional reducer function used to transform the buffer to a single value.
     :type reducer: Optional[Callable[[Sequence[Any]], Any]]
+    :param fold: Optional function that combines the accumulator with a received item, and returns
+        the new accumulator.
+    :type fold: Optional[Callable[[Any, Any], Any]]
+    :param initial: The accumulator of each new group, when ``fold`` is used. A shallow copy is
+        made for each group, so mutable accumulators can be used.
+    :type initial: Any
     """
     def __init__(self, interval: float, source: Optional[AsyncIterable[Any]] = None, *,
                  max_size: float = math.inf,
                  mapper: Optional[Callable[[Any], Any]] = None,
-                 reducer: Optional[Callable[[Sequence[Any]], Any]] = None):
+                 reducer: Optional[Callable[[Sequence[Any]], Any]] = None,
+                 fold: Optional[Callable[[Any, Any], Any]] = None,
+                 initial: Any = None):
         super().__init__()
+        if fold is not None and reducer is not None:
+            raise ValueError('fold and reducer can not be used together.')
         self.source = source
         self.interval = interval
         self.max_size = max_size
         self.mapper = mapper
         self.reducer = reducer
+        self.fold = fold
+        self.initial = initial
 
     async def refine(self, input, output):
         async with trio.open_nursery() as nursery:
@@ -117,47 +493,213 @@ class Group(TrioSection):
             nursery.start_soon(pull_task)
 
             while True:
-                buffer = []
+                buffer = self._new_buffer()
+                size = 0
                 try:
-                    self._add_item(await receive_channel.receive(), buffer)
+                    buffer = self._add_item(await receive_channel.receive(), buffer)
+                    size = 1
                     with trio.move_on_after(self.interval):
                         while True:
-                            if len(buffer) == self.max_size:
+                            if size == self.max_size:
                                 break
-                            self._add_item(await receive_channel.receive(), buffer)
+                            buffer = self._add_item(await receive_channel.receive(), buffer)
+                            size += 1
                 except trio.EndOfChannel:
-                    if buffer:
+                    if size:
                         await output(self._process_result(buffer))
                     break
                 await output(self._process_result(buffer))
 
+    def _new_buffer(self):
+        if self.fold is not None:
+            return copy.copy(self.initial)
+        return []
+
     def _add_item(self, item, buffer):
         if self.mapper is not None:
-            buffer.append(self.mapper(item))
-        else:
-            buffer.append(item)
+            item = self.mapper(item)
+        if self.fold is not None:
+            return self.fold(buffer, item)
+        buffer.append(item)
+        return buffer
 
     def _process_result(self, buffer):
+        if self.fold is not None:
+            return buffer
         if self.reducer is not None:
             return self.reducer(buffer)
         return tuple(buffer)
 
+class KeyedGroup(Group):
+    """Groups received items per key, by time based interval.
+
+    Each item is assigned to a group by the ``key`` function. Groups behave like those of
+    :class:`Group`: A group is opened when an item with a new key is received, and is sent when
+    its ``interval`` has passed since it was opened, or when it reaches ``max_size`` items. Groups
+    are sent as ``(key, group)`` tuples.
+
+    All groups are managed by a single task. Group deadlines are kept in one heap, so handling an
+    item costs O(log keys), regardless of the number of open groups. A key only uses memory while
+    it has an open group. If ``max_keys`` is set, and an item for a new key arrives when the limit
+    is reached, the group with the earliest deadline is sent early, to make room.
+
+    The ``mapper``, ``reducer``, ``fold`` and ``initial`` parameters work as with :class:`Group`.
+
+    :param interval: Time in seconds from when the first item of a group arrives until the group
+        is sent.
+    :type interval: float
+    :param key: Function that returns the group key of an item.
+    :type key: Callable[[Any], Hashable]
+    :param source: Input when used as first section.
+    :type source: Optional[AsyncIterable[Any]]
+    :param max_size: Maximum number of items in a group, which when reached, will cause the group
+        to be sent.
+    :type max_size: int
+    :param max_keys: Maximum number of open groups.
+    :type max_keys: int
+    :param mapper: Optional mapping function used to transform each received item.
+    :type mapper: Optional[Callable[[Any], Any]]
+    :param reducer: Optional reducer function used to transform a group to a single value.
+    :type reducer: Optional[Callable[[Sequence[Any]], Any]]
+    :param fold: Optional function that combines the accumulator with a received item, and returns
+        the new accumulator.
+    :type fold: Optional[Callable[[Any, Any], Any]]
+    :param initial: The accumulator of each new group, when ``fold`` is used.
+    :type initial: Any
+    """
+    def __init__(self, interval: float, key: Callable[[Any], Hashable],
+                 source: Optional[AsyncIterable[Any]] = None, *,
+                 max_size: float = math.inf,
+                 max_keys: float = math.inf,
+                 mapper: Optional[Callable[[Any], Any]] = None,
+                 reducer: Optional[Callable[[Sequence[Any]], Any]] = None,
+                 fold: Optional[Callable[[Any, Any], Any]] = None,
+                 initial: Any = None):
+        super().__init__(interval, source, max_size=max_size, mapper=mapper, reducer=reducer,
+                         fold=fold, initial=initial)
+        if max_keys < 1:
+            raise ValueError(f'Invalid max_keys: {max_keys}')
+        self.key = key
+        self.max_keys = max_keys
+
+    async def refine(self, input, output):
+        if input:
+            source = input
+        elif self.source:
+            source = self.source
+        else:
+            raise RuntimeError('No input provided.')
+
+        groups = {}
+        # Heap of (deadline, serial, key). Entries of groups that were sent because they were
+        # full are left in place, and skipped when they reach the top.
+        deadlines = []
+        serials = itertools.count()
+
+        def stale(entry):
+            group = groups.get(entry[2])
+            return group is None or group.serial != entry[1]
+
+        def prune():
+            while deadlines and stale(deadlines[0]):
+                heapq.heappop(deadlines)
+            if len(deadlines) > 2 * len(groups) + 64:
+                deadlines[:] = [entry for entry in deadlines if not stale(entry)]
+                heapq.heapify(deadlines)
+
+        def pop_group():
+            prune()
+            _, _, key = heapq.heappop(deadlines)
+            return key, self._process_result(groups.pop(key).buffer)
+
+        async with trio.open_nursery() as nursery:
+            send_channel, receive_channel = trio.open_memory_channel(0)
+            async def pull_task():
+                async with send_channel, safe_aclosing(source) as aiter:
+                    async for item in aiter:
+                        await send_channel.send(item)
+            nursery.start_soon(pull_task)
+
+            while True:
+                received = False
+                with trio.move_on_at(deadlines[0][0] if deadlines else math.inf):
+                    try:
+                        item = await receive_channel.receive()
+                    except trio.EndOfChannel:
+                        break
+                    received = True
+                if received:
+                    key = self.key(item)
+                    group = groups.get(key)
+                    if group is None:
+                        if len(groups) >= self.max_keys:
+                            await output(pop_group())
+                        group = groups[key] = _KeyedBuffer(self._new_buffer(), next(serials))
+                        heapq.heappush(deadlines, (trio.current_time() + self.interval,
+                                                   group.serial, key))
+                    group.buffer = self._add_item(item, group.buffer)
+                    group.size += 1
+                    if group.size == self.max_size:
+                        del groups[key]
+                        await output((key, self._process_result(group.buffer)))
+                now = trio.current_time()
+                prune()
+                while deadlines and deadlines[0][0] <= now:
+                    await output(pop_group())
+                    prune()
+
+            while groups:
+                await output(pop_group())
+
+class _KeyedBuffer:
+    """The buffer or accumulator of an open keyed group."""
+    __slots__ = ('buffer', 'size', 'serial')
+
+    def __init__(self, buffer: Any, serial: int):
+        self.buffer = buffer
+        self.size = 0
+        self.serial = serial
+
 class Delay(TrioSection):
     """Delays transmission of each item received by an interval.
 
-    Received items are temporarily stored in an unbounded queue, along with a timestamp, using
-    a background task. The foreground task takes items from the queue, and waits until the
-    item is older than the given interval and then transmits it.
+    Received items are stored in a buffer by a background task, along with the time at which they
+    are due. The foreground task waits until the earliest item is due and then transmits it. The
+    buffer is a heap ordered by due time, so ``interval`` can also be a function, that computes a
+    separate delay for each item. Items are transmitted in order of due time, and items that are due
+    at the same time are transmitted in the order they were received.
 
-    :param interval: Number of seconds that each item is delayed.
-    :type interval: float
+    The number of buffered items can be limited with ``max_buffer``. When the buffer is full, the
+    ``overflow`` policy decides what happens to the next item received. With ``'block'``, the
+    background task stops receiving items, until an item has been transmitted, so backpressure is
+    applied upstream. With ``'drop_newest'``, the received item is discarded. The number of
+    discarded items is available as ``dropped``.
+
+    :param interval: Number of seconds that each item is delayed, or a function that returns the
+        number of seconds that an item is delayed.
+    :type interval: Union[float, Callable[[Any], float]]
     :param source: Input when used as first section.
     :type source: Optional[AsyncIterable[Any]]
+    :param max_buffer: Maximum number of buffered items. (default: unlimited)
+    :type max_buffer: int
+    :param overflow: Policy used when the buffer is full. Options: ``'block'`` (default) \\|
+        ``'drop_newest'``.
+    :type overflow: str
     """
-    def __init__(self, interval: float, source: Optional[AsyncIterable[Any]] = None):
+    def __init__(self, interval: Union[float, Callable[[Any], float]],
+                 source: Optional[AsyncIterable[Any]] = None, *,
+                 max_buffer: float = math.inf,
+                 overflow: str = 'block'):
         super().__init__()
+        if max_buffer < 1:
+            raise ValueError(f'Invalid max_buffer: {max_buffer}')
+        if overflow not in ('block', 'drop_newest'):
+            raise ValueError(f'Invalid overflow argument: {overflow}')
         self.source = source
         self.interval = interval
+        self.max_buffer = max_buffer
+        self.overflow = overflow
+        self.dropped = 0
 
     async def refine(self, input, output):
         if input:
@@ -166,18 +708,42 @@ class Delay(TrioSection):
             source = self.source
         else:
             raise RuntimeError('No input provided.')
-        buffer_input_channel, buffer_output_channel = trio.open_memory_channel(math.inf)
+
+        buffer = []
+        serials = itertools.count()
+        item_added = trio.Event()
+        space_available = trio.Event()
+        exhausted = False
 
         async def pull_task():
-            async with buffer_input_channel, safe_aclosing(source) as aiter:
+            nonlocal space_available, exhausted
+            async with safe_aclosing(source) as aiter:
                 async for item in aiter:
-                    await buffer_input_channel.send((item, trio.current_time() + self.interval))
+                    if len(buffer) >= self.max_buffer and self.overflow == 'drop_newest':
+                        self.dropped += 1
+                        continue
+                    while len(buffer) >= self.max_buffer:
+                        space_available = trio.Event()
+                        await space_available.wait()
+                    heapq.heappush(buffer, (trio.current_time() + self._delay(item),
+                                            next(serials), item))
+                    item_added.set()
+            exhausted = True
+            item_added.set()
 
         async with trio.open_nursery() as nursery:
             nursery.start_soon(pull_task)
-            async for item, timestamp in buffer_output_channel:
+            while buffer or not exhausted:
+                with trio.move_on_at(buffer[0][0] if buffer else math.inf):
+                    await item_added.wait()
+                item_added = trio.Event()
                 now = trio.current_time()
-                if timestamp > now:
-                    await trio.sleep(timestamp - now)
-                await output(item)
-            nursery.cancel_scope.cancel()
+                while buffer and buffer[0][0] <= now:
+                    _, _, item = heapq.heappop(buffer)
+                    space_available.set()
+                    await output(item)
+
+    def _delay(self, item) -> float:
+        if callable(self.interval):
+            return self.interval(item)
+        return self.interval
@@ -1,13 +1,15 @@
 """Pipeline sections for combining multiple inputs into a single output."""
 import builtins
 import itertools
+from typing import Any, List, Optional, Sequence, Tuple
 
 import trio
 
 from ..environments import TrioSection
 from .abc import PipelineSection
 from .weld import weld
-from .._utils import safe_aclose, safe_aclosing
+from .._metrics import Histogram
+from .._utils import safe_aclosing
 
 class Chain(TrioSection):
     """Chains input from one or more sources. Any valid ``PipelineSection`` is an allowed source.
@@ -56,26 +58,172 @@ class Merge(TrioSection):
     Sources can be pipeline sections, which will be treated as first sections, with
     no input. Merge will take care of running the pump task for these sections.
 
+    By default, sources race to send their items, so a busy source can crowd out the others. The
+    ``policy`` parameter selects a scheduling policy instead. With a scheduling policy, each source
+    is iterated into its own buffer of ``buffer_size`` items, and a single task decides which
+    buffer the next item is sent from:
+
+    ``'race'``
+        Sources send items directly, in the order they become available. (default)
+    ``'priority'``
+        The next item is taken from the source with the highest weight that has an item
+        buffered. Items from a high priority control source therefore bypass queued bulk data.
+        Sources with equal weights are served in order.
+    ``'weighted'``
+        Weighted round robin. Each source in turn may send up to its weight in items, before the
+        next source is served. Sources without buffered items are skipped.
+
+    The weights of the sources are given with ``weights``, in the order of the sources, and the
+    weight of the pipeline input with ``input_weight``. All weights default to ``1``. Weights must
+    be integers with the ``'weighted'`` policy.
+
+    The latency of each source, which is the time from an item is received from the source, until
+    it has been accepted downstream, is recorded, and can be read with :meth:`statistics`.
+
     :param PipelineSection \\*sources: One or more async iterables or sections whose contents
         will be merged.
+    :param policy: Scheduling policy. Options: ``'race'`` (default) \\| ``'priority'`` \\|
+        ``'weighted'``.
+    :type policy: str
+    :param weights: Weight of each source.
+    :type weights: Optional[Sequence[float]]
+    :param input_weight: Weight of the pipeline input, if used as a middle section.
+    :type input_weight: float
+    :param buffer_size: Number of items buffered per source, with a scheduling policy.
+    :type buffer_size: int
     """
-    def __init__(self, *sources: PipelineSection):
+    def __init__(self, *sources: PipelineSection,
+                 policy: str = 'race',
+                 weights: Optional[Sequence[float]] = None,
+                 input_weight: float = 1,
+                 buffer_size: int = 1):
         super().__init__()
+        if policy not in ('race', 'priority', 'weighted'):
+            raise ValueError(f'Invalid policy argument: {policy}')
+        if weights is None:
+            weights = [1] * len(sources)
+        if len(weights) != len(sources):
+            raise ValueError('weights must have one weight per source.')
+        if policy == 'weighted' and any(not isinstance(weight, int) or weight < 1
+                                        for weight in (*weights, input_weight)):
+            raise ValueError('Weights must be positive integers with the weighted policy.')
+        if buffer_size < 1:
+            raise ValueError(f'Invalid buffer_size: {buffer_size}')
         self.sources = sources
+        self.policy = policy
+        self.weights = tuple(weights)
+        self.input_weight = input_weight
+        self.buffer_size = buffer_size
+        self._latency: List[Histogram] = []
+
+    def statistics(self) -> List[dict]:
+        """Returns a snapshot of the latency :class:`Histogram <slurry._metrics.Histogram>` of each
+        source, with the pipeline input first, if it is used. Returns an empty list, if the section
+        has not been started."""
+        return [latency.snapshot() for latency in self._latency]
 
     async def refine(self, input, output):
+        sources = self.sources
+        weights = self.weights
+        if input:
+            sources = (input, *sources)
+            weights = (self.input_weight, *weights)
+        self._latency = [Histogram() for _ in sources]
+
         async with trio.open_nursery() as nursery:
+            if self.policy == 'race':
 
-            async def pull_task(source):
-                async with safe_aclosing(weld(nursery, source)) as aiter:
+                async def pull_task(source, latency):
+                    async with safe_aclosing(weld(nursery, source)) as aiter:
+                        async for item in aiter:
+                            received = trio.current_time()
+                            await output(item)
+                            latency.record(trio.current_time() - received)
+
+                for source, latency in builtins.zip(sources, self._latency):
+                    nursery.start_soon(pull_task, source, latency)
+                return
+
+            item_available = trio.Event()
+
+            async def buffer_task(source, send_channel):
+                async with send_channel, safe_aclosing(weld(nursery, source)) as aiter:
                     async for item in aiter:
-                        await output(item)
+                        await send_channel.send((trio.current_time(), item))
+                        item_available.set()
+                item_available.set()
+
+            buffers = []
+            for source in sources:
+                send_channel, receive_channel = trio.open_memory_channel(self.buffer_size)
+                buffers.append(receive_channel)
+                nursery.start_soon(buffer_task, source, send_channel)
 
-            if input:
-                nursery.start_soon(pull_task, input)
+            if self.policy == 'priority':
+                scheduler = _PriorityScheduler(buffers, weights)
+            else:
+                scheduler = _WeightedScheduler(buffers, weights)
 
-            for source in self.sources:
-                nursery.start_soon(pull_task, source)
+            while True:
+                item_available = trio.Event()
+                packet = scheduler.next()
+                if packet is None:
+                    if not scheduler.active:
+                        break
+                    await item_available.wait()
+                    continue
+                index, (received, item) = packet
+                await output(item)
+                self._latency[index].record(trio.current_time() - received)
+
+class _PriorityScheduler:
+    """Takes the next item from the buffer of the highest priority source that has one."""
+    def __init__(self, buffers: List[trio.MemoryReceiveChannel], weights: Sequence[float]):
+        self.buffers = buffers
+        self.order = sorted(range(len(buffers)), key=lambda index: -weights[index])
+        self.active = len(buffers)
+
+    def next(self) -> Optional[Tuple[int, Any]]:
+        """Returns ``(index, packet)``, or ``None`` if no items are buffered."""
+        for index in self.order:
+            buffer = self.buffers[index]
+            if buffer is None:
+                continue
+            try:
+                return index, buffer.receive_nowait()
+            except trio.WouldBlock:
+                pass
+            except trio.EndOfChannel:
+                self.buffers[index] = None
+                self.active -= 1
+        return None
+
+class _WeightedScheduler:
+    """Serves the source buffers in turn, taking up to the weight of each source in items."""
+    def __init__(self, buffers: List[trio.MemoryReceiveChannel], weights: Sequence[int]):
+        self.buffers = buffers
+        self.weights = weights
+        self.active = len(buffers)
+        self._index = 0
+        self._credit = weights[0] if weights else 0
+
+    def next(self) -> Optional[Tuple[int, Any]]:
+        """Returns ``(index, packet)``, or ``None`` if no items are buffered."""
+        for _ in range(len(self.buffers) + 1):
+            buffer = self.buffers[self._index]
+            if buffer is not None and self._credit:
+                try:
+                    packet = buffer.receive_nowait()
+                    self._credit -= 1
+                    return self._index, packet
+                except trio.WouldBlock:
+                    pass
+                except trio.EndOfChannel:
+                    self.buffers[self._index] = None
+                    self.active -= 1
+            self._index = (self._index + 1) % len(self.buffers)
+            self._credit = self.weights[self._index]
+        return None
 
 class Zip(TrioSection):
     """Zips the input from multiple sources. Any valid ``PipelineSection`` is an allowed source.
@@ -83,6 +231,9 @@ class Zip(TrioSection):
     Sources are iterated in parallel and as soon as all sources have an item available, those
     items are output as a tuple.
 
+    Each source is iterated by its own long lived task, which stores received items in a small
+    bounded buffer. Tuples are assembled by taking the next item from each buffer in turn.
+
     Zip can be used as a middle section, and the pipeline input will be added to the sources.
 
     .. Note::
@@ -94,11 +245,17 @@ class Zip(TrioSection):
     :param place_input:  Position of the pipeline input source in the output tuple. Options:
         ``'first'`` (default) \\| ``'last'``.
     :type place_input: string
+    :param buffer_size: Number of items buffered per source, while waiting for the other sources.
+    :type buffer_size: int
     """
-    def __init__(self, *sources: PipelineSection, place_input: str = 'first'):
+    def __init__(self, *sources: PipelineSection, place_input: str = 'first',
+                 buffer_size: int = 1):
         super().__init__()
+        if buffer_size < 0:
+            raise ValueError(f'Invalid buffer_size: {buffer_size}')
         self.sources = sources
         self.place_input = _validate_place_input(place_input)
+        self.buffer_size = buffer_size
 
     async def refine(self, input, output):
         if input:
@@ -109,24 +266,44 @@ class Zip(TrioSection):
         else:
             sources = self.sources
 
-        async with trio.open_nursery() as weld_nursery:
-            sources = [weld(weld_nursery, source) for source in sources]
-
-            async def pull_task(source, index, results: list):
-                try:
-                    results.append((index, await source.__anext__()))
-                except StopAsyncIteration:
-                    weld_nursery.cancel_scope.cancel()
-
-            while True:
-                results = []
-                async with trio.open_nursery() as pull_nursery:
-                    for i, source in builtins.enumerate(sources):
-                        pull_nursery.start_soon(pull_task, source, i, results)
-                await output(tuple(result for i, result in sorted(results, key=lambda packet: packet[0])))
+        async with trio.open_nursery() as nursery:
+            receive_channels = []
+            # Sources that are exhausted. Once an exhausted source has no buffered items left, no
+            # more tuples can be completed, so zipping stops without waiting for other sources.
+            exhausted = []
+            # Index of the next slot to fill. Slots before it already hold items for this tuple.
+            position = 0
+
+            def drained(index):
+                return not receive_channels[index].statistics().current_buffer_used
+
+            async def pull_task(index, source, send_channel):
+                async with send_channel, safe_aclosing(weld(nursery, source)) as aiter:
+                    async for item in aiter:
+                        await send_channel.send(item)
+                exhausted.append(index)
+                if index >= position and drained(index):
+                    nursery.cancel_scope.cancel()
 
-        for source in sources:
-            await safe_aclose(source)
+            for i, source in builtins.enumerate(sources):
+                send_channel, receive_channel = trio.open_memory_channel(self.buffer_size)
+                receive_channels.append(receive_channel)
+                nursery.start_soon(pull_task, i, source, send_channel)
+
+            slots = [None] * len(receive_channels)
+            try:
+                while not any(drained(index) for index in exhausted):
+                    for position, receive_channel in builtins.enumerate(receive_channels):
+                        try:
+                            slots[position] = receive_channel.receive_nowait()
+                        except trio.WouldBlock:
+                            slots[position] = await receive_channel.receive()
+                    position = len(slots)
+                    await output(tuple(slots))
+                    position = 0
+            except trio.EndOfChannel:
+                pass
+            nursery.cancel_scope.cancel()
 
 class ZipLatest(TrioSection):
     """Zips input from multiple sources and outputs a result on every received item. Any valid
@@ -143,9 +320,18 @@ class ZipLatest(TrioSection):
     ZipLatest can be used as a middle section, in which case the upstream pipeline is
     added as an input.
 
+    With many fast sources, outputting a tuple for every received item can be wasteful, if the
+    consumer only needs the latest state. If ``interval`` is set, received items only update the
+    state, and a separate task outputs the state at most once per ``interval`` seconds. The first
+    update after a quiet period is output immediately. An ``interval`` of ``0`` coalesces the
+    updates received while the output task waits for its turn in the scheduler.
+
+    If ``delta`` is ``True``, a dictionary containing only the values that changed since the last
+    output, keyed by their position in the tuple, is output instead of the whole tuple.
+
     .. Note::
         If any single source is exhausted, all remaining sources will be forcibly closed, and
-        the pipeline will stop.
+        the pipeline will stop. Any coalesced state that was not output yet, is output first.
 
     :param PipelineSection \\*sources: One or more ``PipelineSection`` that will be zipped
         together.
@@ -163,20 +349,31 @@ class ZipLatest(TrioSection):
     :param monitor_input: Input is used as a monitored stream instead of a main source.
         Defaults to ``False``
     :type monitor_input: bool
+    :param interval: Minimum time in seconds between outputs. If ``None`` (default), every
+        received item causes an output.
+    :type interval: Optional[float]
+    :param delta: Output a dictionary of changed values, instead of a tuple.
+    :type delta: bool
     """
     def __init__(self, *sources: PipelineSection,
                  partial=True,
                  default=None,
                  monitor=(),
                  place_input='first',
-                 monitor_input=False):
+                 monitor_input=False,
+                 interval: Optional[float] = None,
+                 delta: bool = False):
         super().__init__()
+        if interval is not None and interval < 0:
+            raise ValueError(f'Invalid interval: {interval}')
         self.sources = sources
         self.partial = partial
         self.default = default
         self.monitor = monitor
         self.place_input = _validate_place_input(place_input)
         self.monitor_input = monitor_input
+        self.interval = interval
+        self.delta = delta
 
     async def refine(self, input, output):
         sources = self.sources
@@ -200,6 +397,15 @@ class ZipLatest(TrioSection):
 
         results = [self.default for _ in itertools.chain(sources, monitor)]
         ready = [False for _ in results]
+        changed = {}
+        dirty = trio.Event()
+
+        def take():
+            nonlocal changed
+            if self.delta:
+                delta, changed = changed, {}
+                return delta
+            return tuple(results)
 
         async with trio.open_nursery() as nursery:
 
@@ -208,14 +414,42 @@ class ZipLatest(TrioSection):
                     async for item in aiter:
                         results[index] = item
                         ready[index] = True
+                        if self.delta:
+                            changed[index] = item
                         if not monitor and (self.partial or False not in ready):
-                            await output(tuple(results))
+                            if self.interval is None:
+                                await output(take())
+                            else:
+                                dirty.set()
                 nursery.cancel_scope.cancel()
 
+            async def output_task():
+                nonlocal dirty, changed
+                while True:
+                    await dirty.wait()
+                    dirty = trio.Event()
+                    value = take()
+                    try:
+                        await output(value)
+                    except trio.Cancelled:
+                        # A source ended while the output was blocked. Put the state back, so it
+                        # is output after the sources are closed.
+                        if self.delta:
+                            value.update(changed)
+                            changed = value
+                        dirty.set()
+                        raise
+                    await trio.sleep(self.interval)
+
             for i, source in builtins.enumerate(sources):
                 nursery.start_soon(pull_task, i, source)
             for i, source in builtins.enumerate(monitor):
                 nursery.start_soon(pull_task, i + len(sources), source, True)
+            if self.interval is not None:
+                nursery.start_soon(output_task)
+
+        if dirty.is_set():
+            await output(take())
 
 def _validate_place_input(place_input):
     if isinstance(place_input, str):
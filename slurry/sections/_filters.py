@@ -1,12 +1,17 @@
 """Pipeline sections that filters the incoming items."""
-from typing import Any, AsyncIterable, Callable, Hashable, Optional, Union
+from collections import OrderedDict
+import heapq
+import itertools
+import math
+from typing import Any, AsyncIterable, Callable, Hashable, List, Optional, Union
 
 import trio
 
 from ..environments import TrioSection
 from .._utils import safe_aclosing
+from .abc import DROP, Fusable
 
-class Skip(TrioSection):
+class Skip(TrioSection, Fusable):
     """Skips the first ``count`` items in an asynchronous sequence.
 
     Skip can be used as a starting section if a source is given.
@@ -38,7 +43,17 @@ class Skip(TrioSection):
             async for item in aiter:
                 await output(item)
 
-class SkipWhile(TrioSection):
+    def fuse(self):
+        remaining = self.count
+        def step(item):
+            nonlocal remaining
+            if remaining:
+                remaining -= 1
+                return DROP
+            return item
+        return step
+
+class SkipWhile(TrioSection, Fusable):
     """Skips items until a predicate function evaluates to false, after which all subsequent items are passed.
 
     The predicate function must take an item. If the return value evaluates as true, the item is skipped.
@@ -72,7 +87,18 @@ class SkipWhile(TrioSection):
             async for item in aiter:
                 await output(item)
 
-class Filter(TrioSection):
+    def fuse(self):
+        skipping = True
+        def step(item):
+            nonlocal skipping
+            if skipping:
+                if self.pred(item):
+                    return DROP
+                skipping = False
+            return item
+        return step
+
+class Filter(TrioSection, Fusable):
     """Outputs items that passes a filter function.
 
     The filter function must take an item. If the return value evaluates as true, the item is sent,
@@ -103,7 +129,11 @@ class Filter(TrioSection):
                 if self.func(item):
                     await output(item)
 
-class Changes(TrioSection):
+    def fuse(self):
+        func = self.func
+        return lambda item: item if func(item) else DROP
+
+class Changes(TrioSection, Fusable):
     """Outputs items that are different from the last item output.
 
     The generator stores a reference to the last outputted item. Whenever a new item arrives, it is
@@ -139,6 +169,160 @@ class Changes(TrioSection):
                     last = item
                     await output(item)
 
+    def fuse(self):
+        token = object()
+        last = token
+        def step(item):
+            nonlocal last
+            if last is token or item != last:
+                last = item
+                return item
+            return DROP
+        return step
+
+class Distinct(TrioSection, Fusable):
+    """Outputs items whose key has not been seen recently.
+
+    Unlike :class:`Changes`, which only discards consecutive duplicates, Distinct remembers the keys
+    of many previous items, and discards an item if its key has been seen before. The memory used is
+    bounded by ``max_size``, regardless of the length of the stream. Two backends are available:
+
+    ``'lru'``
+        An exact set of the ``max_size`` most recently seen keys. Seeing a key again refreshes it.
+        If ``ttl`` is set, keys that have not been seen for ``ttl`` seconds are forgotten.
+    ``'bloom'``
+        A pair of Bloom filters, each sized for ``max_size`` keys, with the given
+        ``false_positive_rate``. Keys are added to the newest filter, and when it is full, or when
+        it is older than ``ttl``, the oldest filter is discarded, and a new filter is started. Keys
+        are therefore remembered for at least ``max_size`` keys, or ``ttl`` seconds. Memory use
+        is a fixed number of bits per key, independent of the size of the keys, but a small
+        fraction of distinct items are falsely discarded as duplicates. Keys must be hashable, and
+        are hashed with :func:`hash`.
+
+    Distinct can be used as a starting section, if a source is provided.
+
+    :param source: Source if used as a starting section.
+    :type source: Optional[AsyncIterable[Any]]
+    :param key: Optional function that returns the key of an item. By default, the item itself is
+        the key.
+    :type key: Optional[Callable[[Any], Hashable]]
+    :param backend: Storage for seen keys. Options: ``'lru'`` (default) \\| ``'bloom'``.
+    :type backend: str
+    :param max_size: Number of keys remembered.
+    :type max_size: int
+    :param ttl: Maximum time in seconds a key is remembered. (default: unlimited)
+    :type ttl: float
+    :param false_positive_rate: Probability that a distinct item is discarded, when using the
+        ``'bloom'`` backend.
+    :type false_positive_rate: float
+    """
+    def __init__(self, source: Optional[AsyncIterable[Any]] = None, *,
+                 key: Optional[Callable[[Any], Hashable]] = None,
+                 backend: str = 'lru',
+                 max_size: int = 10_000,
+                 ttl: float = math.inf,
+                 false_positive_rate: float = 0.001):
+        super().__init__()
+        if backend not in ('lru', 'bloom'):
+            raise ValueError(f'Invalid backend argument: {backend}')
+        if max_size < 1:
+            raise ValueError(f'Invalid max_size: {max_size}')
+        if not 0 < false_positive_rate < 1:
+            raise ValueError(f'Invalid false_positive_rate: {false_positive_rate}')
+        self.source = source
+        self.key = key
+        self.backend = backend
+        self.max_size = max_size
+        self.ttl = ttl
+        self.false_positive_rate = false_positive_rate
+
+    async def refine(self, input, output):
+        if input:
+            source = input
+        elif self.source:
+            source = self.source
+        else:
+            raise RuntimeError('No input provided.')
+
+        step = self.fuse()
+        async with safe_aclosing(source) as aiter:
+            async for item in aiter:
+                if step(item) is not DROP:
+                    await output(item)
+
+    def fuse(self):
+        if self.backend == 'lru':
+            seen = _LruSet(self.max_size, self.ttl)
+        else:
+            seen = _RotatingBloomFilter(self.max_size, self.ttl, self.false_positive_rate)
+        key = self.key
+        def step(item):
+            if seen.check_and_add(item if key is None else key(item), trio.current_time()):
+                return DROP
+            return item
+        return step
+
+class _LruSet:
+    """A set of the most recently seen keys, mapped to the time they were last seen."""
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._seen = OrderedDict()
+
+    def check_and_add(self, key: Hashable, now: float) -> bool:
+        """Adds a key to the set, and returns ``True`` if it was already present."""
+        seen = self._seen
+        expired = now - self.ttl
+        while seen and next(iter(seen.values())) < expired:
+            seen.popitem(last=False)
+        present = key in seen
+        seen[key] = now
+        seen.move_to_end(key)
+        if len(seen) > self.max_size:
+            seen.popitem(last=False)
+        return present
+
+class _RotatingBloomFilter:
+    """Two Bloom filters, of which the older is discarded when the newer is full or expired."""
+    def __init__(self, max_size: int, ttl: float, false_positive_rate: float):
+        # A key is checked against both filters, so each gets half the false positive rate.
+        rate = false_positive_rate / 2
+        self.bits = max(8, math.ceil(-max_size * math.log(rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.bits / max_size * math.log(2)))
+        self.max_size = max_size
+        self.ttl = ttl
+        self._current = bytearray((self.bits + 7) // 8)
+        self._previous = bytearray(len(self._current))
+        self._count = 0
+        self._started = -math.inf
+
+    def check_and_add(self, key: Hashable, now: float) -> bool:
+        """Adds a key to the newest filter, and returns ``True`` if it was probably present."""
+        if self._count >= self.max_size or now - self._started > self.ttl:
+            self._previous, self._current = self._current, self._previous
+            self._current[:] = bytes(len(self._current))
+            self._count = 0
+            self._started = now
+        positions = self._positions(key)
+        current = self._current
+        present = all(current[p >> 3] & (1 << (p & 7)) for p in positions)
+        if not present:
+            previous = self._previous
+            present = all(previous[p >> 3] & (1 << (p & 7)) for p in positions)
+            for p in positions:
+                current[p >> 3] |= 1 << (p & 7)
+            self._count += 1
+        return present
+
+    def _positions(self, key: Hashable) -> List[int]:
+        # Double hashing, with two 32 bit hashes derived from a mixed 64 bit hash of the key.
+        h = (hash(key) * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+        h ^= h >> 31
+        h = (h * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF
+        h ^= h >> 29
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
 class RateLimit(TrioSection):
     """Limits data rate of an input to a certain interval.
 
@@ -152,22 +336,62 @@ class RateLimit(TrioSection):
     If a callable is supplied, it will be called with the item as argument and should return a
     hashable value.
 
+    The rate is enforced per subject with a token bucket, holding up to ``burst`` items, that is
+    refilled by one item every ``interval`` seconds. With the default ``burst`` of one, this is
+    the same as the timer described above. If ``throttle`` is ``True``, items that exceed the rate
+    are not discarded, but held back until they are allowed, which shapes the output to the
+    configured rate without losing items. Held back items are kept in a heap ordered by the time
+    they are allowed, so an item only waits for items of its own subject. The number of held back
+    items can be limited with ``max_buffer``, in which case no more items are received while the
+    buffer is full, so backpressure is applied upstream.
+
+    The state of a subject is discarded, as soon as its bucket is full again, so memory use is
+    proportional to the number of recently seen subjects. With the default ``burst`` of one, and
+    without ``throttle``, buckets are full again in the order their subjects were last seen, and
+    state is pruned in amortized O(1) time per item. Otherwise, expired state is found with a heap
+    ordered by the time each bucket is full again, in O(log n) time per item, where n is the number
+    of subjects with state. To put a hard limit on the memory used with many active subjects,
+    ``max_subjects`` can be set, in which case the least recently seen subjects are forgotten first.
+
     :param interval: Minimum number of seconds between each sent item.
     :type interval: float
     :param source: Input when used as first section.
     :type source: Optional[AsyncIterable[Any]]
     :param subject: Subject for per subject rate limiting.
     :type subject: Optional[]
+    :param burst: Number of items per subject, that can be sent without delay after a quiet
+        period.
+    :type burst: int
+    :param throttle: Hold back items that exceed the rate, instead of discarding them.
+    :type throttle: bool
+    :param max_subjects: Maximum number of subjects to keep state for.
+    :type max_subjects: Optional[int]
+    :param max_buffer: Maximum number of items held back by ``throttle``. (default: unlimited)
+    :type max_buffer: int
     """
     def __init__(self,
                  interval,
                  source: Optional[AsyncIterable[Any]] = None,
                  *,
-                 subject: Optional[Union[Hashable, Callable[[Any], Hashable]]] = None):
+                 subject: Optional[Union[Hashable, Callable[[Any], Hashable]]] = None,
+                 burst: int = 1,
+                 throttle: bool = False,
+                 max_subjects: Optional[int] = None,
+                 max_buffer: float = math.inf):
         super().__init__()
+        if burst < 1:
+            raise ValueError(f'Invalid burst: {burst}')
+        if max_subjects is not None and max_subjects < 1:
+            raise ValueError(f'Invalid max_subjects: {max_subjects}')
+        if max_buffer < 1:
+            raise ValueError(f'Invalid max_buffer: {max_buffer}')
         self.source = source
         self.interval = interval
         self.subject = subject
+        self.burst = burst
+        self.throttle = throttle
+        self.max_subjects = max_subjects
+        self.max_buffer = max_buffer
 
     async def refine(self, input, output):
         if input:
@@ -184,12 +408,87 @@ class RateLimit(TrioSection):
         else:
             get_subject = lambda item: item[self.subject]
 
-        timestamps = {}
-        async with safe_aclosing(source) as aiter:
-            async for item in aiter:
+        # Token buckets are stored as the time at which the bucket is full again, ordered by when
+        # the subject was last seen. Without burst or throttle, buckets are full again in the same
+        # order, so expired state is pruned from the front. Otherwise, expired state is found with
+        # a heap of (full_at, serial, subject). Entries of subjects that were seen again, or
+        # forgotten, are left in place, and skipped when they reach the top.
+        full_at = OrderedDict()
+        ordered = self.burst == 1 and not self.throttle
+        expiries = []
+        serials = itertools.count()
+        tolerance = (self.burst - 1) * self.interval
+
+        def stale(entry):
+            return full_at.get(entry[2]) != entry[0]
+
+        def prune(now):
+            if ordered:
+                while full_at and next(iter(full_at.values())) < now:
+                    full_at.popitem(last=False)
+                return
+            while expiries and expiries[0][0] < now:
+                entry = heapq.heappop(expiries)
+                if not stale(entry):
+                    del full_at[entry[2]]
+            if len(expiries) > 2 * len(full_at) + 64:
+                expiries[:] = [entry for entry in expiries if not stale(entry)]
+                heapq.heapify(expiries)
+
+        def admit(item) -> Optional[float]:
+            """Takes a token from the bucket of the subject of the item. Returns the time at which
+            the item can be sent, or ``None`` if it should be discarded."""
+            now = trio.current_time()
+            prune(now)
+            subject = get_subject(item)
+            then = full_at.get(subject, -math.inf)
+            allowed_at = then - tolerance
+            if allowed_at >= now:
+                if not self.throttle:
+                    return None
+            else:
+                allowed_at = now
+            full_at[subject] = max(then, allowed_at) + self.interval
+            full_at.move_to_end(subject)
+            if not ordered:
+                heapq.heappush(expiries, (full_at[subject], next(serials), subject))
+            if self.max_subjects is not None and len(full_at) > self.max_subjects:
+                full_at.popitem(last=False)
+            return allowed_at
+
+        if not self.throttle:
+            async with safe_aclosing(source) as aiter:
+                async for item in aiter:
+                    if admit(item) is not None:
+                        await output(item)
+            return
+
+        # Held back items are kept in a heap of (allowed_at, serial, item), like in Delay.
+        buffer = []
+        item_added = trio.Event()
+        space_available = trio.Event()
+        exhausted = False
+
+        async def pull_task():
+            nonlocal space_available, exhausted
+            async with safe_aclosing(source) as aiter:
+                async for item in aiter:
+                    while len(buffer) >= self.max_buffer:
+                        space_available = trio.Event()
+                        await space_available.wait()
+                    heapq.heappush(buffer, (admit(item), next(serials), item))
+                    item_added.set()
+            exhausted = True
+            item_added.set()
+
+        async with trio.open_nursery() as nursery:
+            nursery.start_soon(pull_task)
+            while buffer or not exhausted:
+                with trio.move_on_at(buffer[0][0] if buffer else math.inf):
+                    await item_added.wait()
+                item_added = trio.Event()
                 now = trio.current_time()
-                subject = get_subject(item)
-                then = timestamps.get(subject)
-                if then is None or now - then > self.interval:
-                    timestamps[subject] = now
+                while buffer and buffer[0][0] <= now:
+                    _, _, item = heapq.heappop(buffer)
+                    space_available.set()
                     await output(item)
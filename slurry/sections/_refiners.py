@@ -1,10 +1,15 @@
 """Sections for transforming an input into a different output."""
-from typing import Any, AsyncIterable, Optional
+import math
+from typing import Any, AsyncIterable, Callable, Optional, Sequence, Type
 
-from ..environments import TrioSection
-from .._utils import safe_aclosing
+import trio
 
-class Map(TrioSection):
+from ..environments import TrioSection, ThreadSection, ProcessSection
+from .._utils import ConcurrentMapper, safe_aclosing
+from ._buffers import Group
+from .abc import Fusable, Section
+
+class Map(TrioSection, Fusable):
     """Maps over an asynchronous sequence.
 
     Map can be used as a starting section, if a source is provided.
@@ -29,3 +34,149 @@ class Map(TrioSection):
         async with safe_aclosing(source) as aiter:
             async for item in aiter:
                 await output(self.func(item))
+
+    def fuse(self):
+        return self.func
+
+class ConcurrentMap(TrioSection):
+    """Maps an async function over an asynchronous sequence, with up to ``max_concurrency`` items
+    processed at once.
+
+    Results are sent either in input order, in which case completed results wait in a reorder
+    buffer, until all earlier results have been sent, or in the order they complete. When
+    ``max_concurrency`` items have been received, but their results not yet sent, no more input is
+    received, so backpressure is maintained.
+
+    ConcurrentMap can be used as a starting section, if a source is provided.
+
+    :param func: Async mapping function.
+    :type func: Callable[[Any], Awaitable[Any]]
+    :param max_concurrency: Maximum number of items processed at once.
+    :type max_concurrency: int
+    :param ordered: If ``True`` (default), results are sent in input order.
+    :type ordered: bool
+    :param source: Source if used as a starting section.
+    :type source: Optional[AsyncIterable[Any]]
+    """
+    def __init__(self, func, max_concurrency: int, ordered: bool = True,
+                 source: Optional[AsyncIterable[Any]] = None):
+        if max_concurrency < 1:
+            raise ValueError(f'Invalid max_concurrency argument: {max_concurrency}')
+        self.func = func
+        self.max_concurrency = max_concurrency
+        self.ordered = ordered
+        self.source = source
+
+    async def refine(self, input, output):
+        if input:
+            source = input
+        elif self.source:
+            source = self.source
+        else:
+            raise RuntimeError('No input provided.')
+
+        await ConcurrentMapper(self.func, self.max_concurrency, self.ordered).run(source, output)
+
+class BatchMap(TrioSection):
+    """Maps a function over batches of items from an asynchronous sequence.
+
+    Items are collected into a list, in the same way as :class:`Group`, until ``max_size`` items
+    have been received, or ``interval`` seconds have passed since the first item of the batch was
+    received. ``func`` is then called once with the whole list, and must return a sequence of
+    results, which are sent one at a time. Batching is therefore invisible to the sections before
+    and after ``BatchMap``, while ``func`` can use vectorized operations, and the per item call
+    overhead is avoided. The number of results does not need to match the number of items.
+
+    ``func`` runs in the environment given by ``environment``:
+
+    * :class:`TrioSection <slurry.environments.TrioSection>` (default): ``func`` is called
+      directly in the event loop, and must not block.
+    * :class:`ThreadSection <slurry.environments.ThreadSection>`: ``func`` is called in a
+      background thread.
+    * :class:`ProcessSection <slurry.environments.ProcessSection>`: ``func`` is called in a
+      separate process, and must be pickleable, along with the items and results.
+
+    BatchMap can be used as a starting section, if a source is provided.
+
+    :param func: Function that maps a list of items to a sequence of results.
+    :type func: Callable[[List[Any]], Sequence[Any]]
+    :param max_size: Maximum number of items in a batch.
+    :type max_size: int
+    :param source: Source if used as a starting section.
+    :type source: Optional[AsyncIterable[Any]]
+    :param interval: Maximum time in seconds from when the first item of a batch is received,
+        until the batch is processed. (default: unlimited)
+    :type interval: float
+    :param environment: The environment that ``func`` runs in.
+    :type environment: Type[Section]
+    """
+    def __init__(self, func: Callable[[Sequence[Any]], Sequence[Any]], max_size: int,
+                 source: Optional[AsyncIterable[Any]] = None, *,
+                 interval: float = math.inf,
+                 environment: Type[Section] = TrioSection):
+        if max_size < 1:
+            raise ValueError(f'Invalid max_size argument: {max_size}')
+        for base, apply_class in _BATCH_APPLY.items():
+            if isinstance(environment, type) and issubclass(environment, base):
+                self._apply = apply_class(func)
+                break
+        else:
+            raise TypeError(f'Unsupported environment: {environment!r}')
+        self.func = func
+        self.max_size = max_size
+        self.source = source
+        self.interval = interval
+        self.environment = environment
+
+    async def refine(self, input, output):
+        if input:
+            source = input
+        elif self.source:
+            source = self.source
+        else:
+            raise RuntimeError('No input provided.')
+
+        async def send_results(results):
+            for result in results:
+                await output(result)
+
+        async with trio.open_nursery() as nursery:
+            send_channel, receive_channel = trio.open_memory_channel(0)
+
+            async def group_task():
+                async with send_channel:
+                    await Group(self.interval, max_size=self.max_size,
+                                reducer=list).refine(source, send_channel.send)
+
+            nursery.start_soon(group_task)
+            await self._apply.pump(receive_channel, send_results)
+
+class _TrioBatchApply(TrioSection):
+    def __init__(self, func):
+        self.func = func
+
+    async def refine(self, input, output):
+        async for batch in input:
+            await output(self.func(batch))
+
+class _ThreadBatchApply(ThreadSection):
+    def __init__(self, func):
+        self.func = func
+
+    def refine(self, input, output):
+        for batch in input:
+            output(self.func(batch))
+
+class _ProcessBatchApply(ProcessSection):
+    def __init__(self, func):
+        self.func = func
+
+    def refine(self, input, output):
+        for batch in input:
+            output(self.func(batch))
+
+_BATCH_APPLY = {
+    TrioSection: _TrioBatchApply,
+    ThreadSection: _ThreadBatchApply,
+    ProcessSection: _ProcessBatchApply,
+}
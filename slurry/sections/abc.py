@@ -1,11 +1,23 @@
 """ Abstract Base Classes for building pipeline sections. """
 from abc import ABC, abstractmethod
-from typing import Any, AsyncIterable, Awaitable, Callable, Iterable, Optional, Tuple, Union
+from typing import Any, AsyncIterable, Awaitable, Callable, Iterable, Optional, Tuple, Union, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .weld import Transport
 
 PipelineSection = Union["Section", Tuple["PipelineSection", ...]]
 
 class Section(ABC):
-    """Defines the basic environment api."""
+    """Defines the basic environment api.
+
+    Fields:
+
+    * ``transport``: Optional :class:`Transport <slurry.sections.weld.Transport>`, which configures
+      buffering and batching of the output of this section. If ``None`` (default), the pipeline
+      transport is used.
+    """
+
+    transport: Optional["Transport"] = None
 
     @abstractmethod
     async def pump(self, input: Optional[AsyncIterable[Any]], output: Callable[[Any], Awaitable[None]]):
@@ -58,3 +70,30 @@ class SyncSection(Section):
         :param output: The callable used to send output.
         :type output: Callable[[Any], None]
         """
+
+class _Drop:
+    def __repr__(self):
+        return 'DROP'
+
+DROP = _Drop()
+"""Sentinel returned by a fused step function, to discard the item."""
+
+class Fusable(ABC):
+    """Fusable defines an opt-in protocol for sections that process their input strictly one item
+    at a time, emitting at most one output item per input item, without doing any async work.
+
+    When :func:`weld <slurry.sections.weld.weld>` finds two or more fusable sections next to each
+    other, it runs them as a single task that calls each step function in turn, instead of
+    connecting them with memory channels. Fusable sections must still implement a complete
+    ``refine`` method, which is used when the section is not fused.
+    """
+
+    @abstractmethod
+    def fuse(self) -> Callable[[Any], Any]:
+        """Returns a step function, which is called with each input item and returns the output
+        item, or :data:`DROP` if the item should be discarded. A new step function is requested
+        each time the pipeline runs, so any state, like counters, should be local to the step
+        function.
+
+        The step function is called from the Trio event loop and must not block.
+        """
@@ -0,0 +1,226 @@
+"""Incremental aggregators for sliding windows.
+
+An aggregator keeps a running aggregate over the items in a first in, first out window. Items
+are added to the newest end of the window, and removed from the oldest end, and the aggregate is
+updated for each change, instead of being recomputed over the whole window. Aggregators are used
+with the ``aggregate`` parameter of :class:`Window <slurry.sections.Window>`.
+"""
+from abc import ABC, abstractmethod
+from collections import deque
+import math
+from typing import Any, Callable, List, Tuple
+
+class Aggregator(ABC):
+    """Abstract base class for aggregators."""
+
+    @abstractmethod
+    def add(self, item: Any):
+        """Adds an item to the newest end of the window.
+
+        :param item: The item.
+        :type item: Any
+        """
+
+    @abstractmethod
+    def remove(self, item: Any):
+        """Removes the oldest item from the window.
+
+        :param item: The oldest item, which is being removed.
+        :type item: Any
+        """
+
+    @abstractmethod
+    def value(self) -> Any:
+        """Returns the aggregate of the items currently in the window."""
+
+class Count(Aggregator):
+    """Counts the items in the window."""
+    def __init__(self):
+        self.count = 0
+
+    def add(self, item):
+        self.count += 1
+
+    def remove(self, item):
+        self.count -= 1
+
+    def value(self):
+        return self.count
+
+class Sum(Aggregator):
+    """Sums the items in the window in O(1) per item.
+
+    .. Note::
+        With floating point items, the running sum can accumulate rounding errors over time.
+    """
+    def __init__(self):
+        self.sum = 0
+
+    def add(self, item):
+        self.sum += item
+
+    def remove(self, item):
+        self.sum -= item
+
+    def value(self):
+        return self.sum
+
+class Mean(Aggregator):
+    """Arithmetic mean of the items in the window, in O(1) per item."""
+    def __init__(self):
+        self.count = 0
+        self.sum = 0
+
+    def add(self, item):
+        self.count += 1
+        self.sum += item
+
+    def remove(self, item):
+        self.count -= 1
+        self.sum -= item
+
+    def value(self):
+        return self.sum / self.count if self.count else math.nan
+
+class Variance(Aggregator):
+    """Variance of the items in the window, in O(1) per item, using Welford's algorithm.
+
+    :param ddof: Delta degrees of freedom. Use ``0`` for the population variance, and ``1`` for
+        the sample variance.
+    :type ddof: int
+    """
+    def __init__(self, ddof: int = 0):
+        self.ddof = ddof
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, item):
+        self.count += 1
+        delta = item - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (item - self.mean)
+
+    def remove(self, item):
+        self.count -= 1
+        if not self.count:
+            self.mean = self._m2 = 0.0
+            return
+        delta = item - self.mean
+        self.mean -= delta / self.count
+        self._m2 -= delta * (item - self.mean)
+
+    def value(self):
+        if self.count <= self.ddof:
+            return math.nan
+        return max(self._m2, 0.0) / (self.count - self.ddof)
+
+class _Monotonic(Aggregator):
+    """Keeps a deque of candidates for the extreme value, in amortized O(1) per item."""
+    def __init__(self):
+        self._candidates: deque = deque()
+        self._added = 0
+        self._removed = 0
+
+    @staticmethod
+    @abstractmethod
+    def _dominates(a, b) -> bool:
+        """Returns ``True`` if ``a`` makes ``b`` obsolete as a candidate."""
+
+    def add(self, item):
+        while self._candidates and self._dominates(item, self._candidates[-1][1]):
+            self._candidates.pop()
+        self._candidates.append((self._added, item))
+        self._added += 1
+
+    def remove(self, item):
+        if self._candidates[0][0] == self._removed:
+            self._candidates.popleft()
+        self._removed += 1
+
+    def value(self):
+        return self._candidates[0][1]
+
+class Min(_Monotonic):
+    """Minimum of the items in the window, in amortized O(1) per item."""
+    @staticmethod
+    def _dominates(a, b):
+        return a <= b
+
+class Max(_Monotonic):
+    """Maximum of the items in the window, in amortized O(1) per item."""
+    @staticmethod
+    def _dominates(a, b):
+        return a >= b
+
+class Invertible(Aggregator):
+    """Aggregates with an invertible binary operation, like addition or multiplication, in O(1)
+    per item.
+
+    :param combine: Function that combines the aggregate with an added item.
+    :type combine: Callable[[Any, Any], Any]
+    :param inverse: Function that removes an item from the aggregate.
+    :type inverse: Callable[[Any, Any], Any]
+    :param initial: The aggregate of an empty window.
+    :type initial: Any
+    """
+    def __init__(self, combine: Callable[[Any, Any], Any], inverse: Callable[[Any, Any], Any],
+                 initial: Any):
+        self.combine = combine
+        self.inverse = inverse
+        self.aggregate = initial
+
+    def add(self, item):
+        self.aggregate = self.combine(self.aggregate, item)
+
+    def remove(self, item):
+        self.aggregate = self.inverse(self.aggregate, item)
+
+    def value(self):
+        return self.aggregate
+
+class Associative(Aggregator):
+    """Aggregates with any associative binary operation, like ``min``, ``max``, ``gcd`` or
+    concatenation, in amortized O(1) operations per item.
+
+    Uses a queue built from two stacks. The back stack holds the aggregate of the newest items, and
+    the front stack holds the aggregates of each suffix of the oldest items. When the front stack
+    runs out, the back stack is moved to it.
+
+    :param combine: Associative function that combines two aggregates, the older one first.
+    :type combine: Callable[[Any, Any], Any]
+    :param initial: The aggregate of an empty window.
+    :type initial: Any
+    """
+    def __init__(self, combine: Callable[[Any, Any], Any], initial: Any = None):
+        self.combine = combine
+        self.initial = initial
+        self._front: List[Any] = []
+        self._back: List[Any] = []
+        self._back_aggregate: Tuple[Any, ...] = ()
+
+    def add(self, item):
+        self._back.append(item)
+        if self._back_aggregate:
+            self._back_aggregate = (self.combine(self._back_aggregate[0], item),)
+        else:
+            self._back_aggregate = (item,)
+
+    def remove(self, item):
+        if not self._front:
+            aggregate = None
+            while self._back:
+                value = self._back.pop()
+                aggregate = value if not self._front else self.combine(value, aggregate)
+                self._front.append(aggregate)
+            self._back_aggregate = ()
+        self._front.pop()
+
+    def value(self):
+        if self._front and self._back_aggregate:
+            return self.combine(self._front[-1], self._back_aggregate[0])
+        if self._front:
+            return self._front[-1]
+        if self._back_aggregate:
+            return self._back_aggregate[0]
+        return self.initial
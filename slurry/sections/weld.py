@@ -1,42 +1,131 @@
 """Contains the `weld` utility function for composing sections."""
 
-from typing import Any, AsyncIterable, Optional, cast
+import math
+from typing import Any, AsyncIterable, Awaitable, Callable, List, Optional, Sequence, cast
 
 import trio
 
-from .abc import PipelineSection, Section
-from .._utils import safe_aclose
+from .abc import DROP, Fusable, PipelineSection, Section
+from .._metrics import PipelineMetrics, SectionMetrics
+from .._utils import safe_aclose, safe_aclosing
 
-def weld(nursery, *sections: PipelineSection) -> AsyncIterable[Any]:
+class Transport:
+    """Configures the channel that carries the output of a section to the next section.
+
+    By default, sections are connected by unbuffered channels, so every item is handed over
+    synchronously. A buffer lets a bursty section run ahead of a momentarily slower neighbour.
+
+    With a ``batch_size`` larger than one, items are sent downstream in batches. The batch is
+    sent when it is full, when the oldest item in it has waited for ``batch_latency`` seconds, when
+    the section waits for input that is not immediately available, or when the section finishes.
+    Batches are unpacked transparently before they reach the next section.
+
+    A transport can be set for a whole pipeline, or for an individual section, by assigning it to
+    the ``transport`` attribute of the section.
+
+    :param buffer_size: Number of items, or batches, that the channel can hold. (default: ``0``)
+    :type buffer_size: int
+    :param batch_size: Maximum number of items in a batch. (default: ``1``, no batching)
+    :type batch_size: int
+    :param batch_latency: Maximum time in seconds an item is held back in an incomplete batch.
+        (default: ``0.01``)
+    :type batch_latency: float
+    """
+    def __init__(self, buffer_size: int = 0, *,
+                 batch_size: int = 1,
+                 batch_latency: float = 0.01):
+        if batch_size < 1:
+            raise ValueError(f'Invalid batch_size argument: {batch_size}')
+        self.buffer_size = buffer_size
+        self.batch_size = batch_size
+        self.batch_latency = batch_latency
+
+    @property
+    def batching(self) -> bool:
+        """``True`` if items are sent in batches."""
+        return self.batch_size > 1
+
+_DEFAULT_TRANSPORT = Transport()
+
+def weld(nursery, *sections: PipelineSection,
+         metrics: Optional[PipelineMetrics] = None,
+         fuse: bool = True,
+         transport: Optional[Transport] = None) -> AsyncIterable[Any]:
     """
     Connects the individual parts of a sequence of pipeline sections together and starts pumps for
     individual Sections. It returns an async iterable which yields results of the sequence.
 
+    Consecutive :class:`Fusable <slurry.sections.abc.Fusable>` sections, that receive input from
+    a previous section, are fused together and run as a single task.
+
     :param nursery: The nursery that runs individual pipeline section pumps.
     :type nursery: :class:`trio.Nursery`
     :param PipelineSection \\*sections: Pipeline sections.
+    :param metrics: If supplied, runtime metrics for each section is recorded here.
+    :type metrics: Optional[PipelineMetrics]
+    :param fuse: Fuse consecutive fusable sections. (default: ``True``)
+    :type fuse: bool
+    :param transport: Default transport between sections. Sections with their own ``transport``
+        attribute set, use that instead. (default: unbuffered, no batching)
+    :type transport: Optional[Transport]
     """
 
-    async def pump(section, input: Optional[AsyncIterable[Any]], output: trio.MemorySendChannel[Any]):
-        try:
-            await section.pump(input, output.send)
-        except trio.BrokenResourceError:
-            pass
+    async def pump(section,
+                   input: Optional[AsyncIterable[Any]],
+                   output: trio.MemorySendChannel[Any],
+                   section_transport: Transport,
+                   section_metrics: Optional[SectionMetrics] = None):
+        if section_transport.batching:
+            async with trio.open_nursery() as batch_nursery:
+                batcher = _BatchSender(output, section_transport)
+                batch_nursery.start_soon(batcher.run_timer)
+                if isinstance(input, (_Unbatch, trio.MemoryReceiveChannel)):
+                    input = _IdleFlushInput(input, batcher)
+                await run(section, input, batcher.send, output, section_metrics)
+                try:
+                    await batcher.flush()
+                except trio.BrokenResourceError:
+                    pass
+                batch_nursery.cancel_scope.cancel()
+        else:
+            await run(section, input, output.send, output, section_metrics)
         if input:
             await safe_aclose(input)
         await safe_aclose(output)
 
+    async def run(section, input, send, output, section_metrics):
+        if section_metrics is not None:
+            input, send = section_metrics.instrument(input, send, output)
+        try:
+            await section.pump(input, send)
+        except trio.BrokenResourceError:
+            pass
+
+    if transport is None:
+        transport = _DEFAULT_TRANSPORT
+    if fuse:
+        sections = _fuse(sections)
+
     section_input = None
     output = None
     for section in sections:
         if isinstance(section, Section):
-            section_output, output = trio.open_memory_channel(0)
-            nursery.start_soon(pump, section, section_input, section_output)
+            section_transport = section.transport or transport
+            section_output, output = trio.open_memory_channel(section_transport.buffer_size)
+            if section_transport.batching:
+                output = _Unbatch(output)
+            section_metrics = None
+            if metrics is not None:
+                section_metrics = metrics.add_section(_section_name(section))
+            nursery.start_soon(pump, section, section_input, section_output, section_transport,
+                               section_metrics)
         elif isinstance(section, tuple):
             if section_input:
-                output = weld(nursery, section_input, *section)
+                output = weld(nursery, section_input, *section,
+                              metrics=metrics, fuse=fuse, transport=transport)
             else:
-                output = weld(nursery, *section)
+                output = weld(nursery, *section,
+                              metrics=metrics, fuse=fuse, transport=transport)
         else:
             if output:
                 raise ValueError('Invalid pipeline section.', section)
@@ -44,3 +133,147 @@ def weld(nursery, *sections: PipelineSection) -> AsyncIterable[Any]:
         section_input = output
 
     return cast(AsyncIterable[Any], output)
+
+class _BatchSender:
+    """Collects output items into batches, and sends them when full or too old."""
+    def __init__(self, channel: trio.MemorySendChannel, transport: Transport):
+        self._channel = channel
+        self._batch_size = transport.batch_size
+        self._batch_latency = transport.batch_latency
+        self._batch: List[Any] = []
+        self._deadline = math.inf
+        self._pending = trio.Event()
+        self._broken = False
+
+    @property
+    def pending(self) -> bool:
+        """``True`` if there are items waiting to be sent."""
+        return bool(self._batch)
+
+    async def send(self, item):
+        if self._broken:
+            raise trio.BrokenResourceError
+        if not self._batch:
+            self._deadline = trio.current_time() + self._batch_latency
+            self._pending.set()
+        self._batch.append(item)
+        if len(self._batch) >= self._batch_size:
+            await self.flush()
+
+    async def flush(self):
+        if self._batch:
+            batch, self._batch = self._batch, []
+            self._pending = trio.Event()
+            await self._channel.send(batch)
+
+    async def run_timer(self):
+        while True:
+            await self._pending.wait()
+            if trio.current_time() >= self._deadline:
+                try:
+                    await self.flush()
+                except trio.BrokenResourceError:
+                    self._broken = True
+                    return
+            else:
+                await trio.sleep_until(self._deadline)
+
+class _Unbatch:
+    """Async iterator that receives batches from a channel and yields the individual items."""
+    def __init__(self, channel: trio.MemoryReceiveChannel):
+        self._channel = channel
+        self._batch: List[Any] = []
+        self._index = 0
+
+    def would_block(self) -> bool:
+        """``True`` if there is no item available without waiting."""
+        return self._index >= len(self._batch) and _channel_would_block(self._channel)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while self._index >= len(self._batch):
+            try:
+                self._batch = await self._channel.receive()
+            except trio.EndOfChannel:
+                raise StopAsyncIteration from None
+            self._index = 0
+        item = self._batch[self._index]
+        self._index += 1
+        return item
+
+    async def aclose(self):
+        await self._channel.aclose()
+
+class _IdleFlushInput:
+    """Input wrapper that flushes pending output batches, before waiting for input."""
+    def __init__(self, input, batcher: _BatchSender):
+        self._aiter = input.__aiter__()
+        self._input = input
+        self._batcher = batcher
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._batcher.pending:
+            if isinstance(self._input, _Unbatch):
+                idle = self._input.would_block()
+            else:
+                idle = _channel_would_block(self._input)
+            if idle:
+                await self._batcher.flush()
+        return await self._aiter.__anext__()
+
+    async def aclose(self):
+        await safe_aclose(self._aiter)
+
+def _channel_would_block(channel: trio.MemoryReceiveChannel) -> bool:
+    statistics = channel.statistics()
+    return not statistics.current_buffer_used and not statistics.tasks_waiting_send
+
+class _FusedSection(Section):
+    """Runs the step functions of a sequence of fusable sections in a single task."""
+    def __init__(self, sections: Sequence[Fusable]):
+        self.sections = sections
+        self.transport = sections[-1].transport
+
+    async def pump(self, input: Optional[AsyncIterable[Any]], output: Callable[[Any], Awaitable[None]]):
+        steps = [section.fuse() for section in self.sections]
+        async with safe_aclosing(input) as aiter:
+            async for item in aiter:
+                for step in steps:
+                    item = step(item)
+                    if item is DROP:
+                        break
+                else:
+                    await output(item)
+
+def _fuse(sections: Sequence[PipelineSection]) -> Sequence[PipelineSection]:
+    """Replaces runs of two or more fusable sections with a fused section. The first section is
+    never fused, since it does not receive input. A section with its own transport ends a run."""
+    fused = list(sections[:1])
+    run = []
+    for section in sections[1:]:
+        if isinstance(section, Fusable) and isinstance(section, Section):
+            run.append(section)
+            if section.transport is not None:
+                fused.extend(_fuse_run(run))
+                run = []
+            continue
+        fused.extend(_fuse_run(run))
+        run = []
+        fused.append(section)
+    fused.extend(_fuse_run(run))
+    return fused
+
+def _fuse_run(run):
+    if len(run) > 1:
+        return [_FusedSection(run)]
+    return run
+
+def _section_name(section: Section) -> str:
+    if isinstance(section, _FusedSection):
+        return '+'.join(type(fused).__name__ for fused in section.sections)
+    return type(section).__name__
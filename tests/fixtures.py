@@ -1,14 +1,18 @@
 """Asynchronous generators for testing sections."""
 import math
+import time
 
 from typing import Any, Callable, Iterable
 
-from slurry.environments import ThreadSection, ProcessSection
+import threading
+
+from slurry.environments import ThreadSection, ThreadPoolSection, ProcessSection, ProcessPoolSection
 from slurry._utils import safe_aclose
 
 class SyncSquares(ThreadSection):
-    def __init__(self, raise_after=math.inf) -> None:
+    def __init__(self, raise_after=math.inf, chunk_size=1) -> None:
         self.raise_after = raise_after
+        self.chunk_size = chunk_size
 
     def refine(self, input, output):
         for i, j in enumerate(input):
@@ -16,6 +20,23 @@ class SyncSquares(ThreadSection):
             if i == self.raise_after - 1:
                 raise RuntimeError('Max iterations reached.')
 
+class SlowDoubles(ThreadPoolSection):
+    def __init__(self, max_workers, ordered=True) -> None:
+        self.max_workers = max_workers
+        self.ordered = ordered
+        self.running = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    def apply(self, item):
+        with self._lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep((3 - item % 3) * 0.005)
+        with self._lock:
+            self.running -= 1
+        return item * 2
+
 class SimpleProcessSection(ProcessSection):
     def __init__(self, value) -> None:
         self.value = value
@@ -57,3 +78,51 @@ class AsyncIteratorWithoutAclose:
         except StopAsyncIteration:
             await safe_aclose(self.source_aiter)
             raise
+
+class SlowEchoSection(ProcessSection):
+    def __init__(self, delay, max_input_in_flight=1, max_output_in_flight=1) -> None:
+        self.delay = delay
+        self.max_input_in_flight = max_input_in_flight
+        self.max_output_in_flight = max_output_in_flight
+
+    def refine(self, input, output):
+        for item in input:
+            time.sleep(self.delay)
+            output(item)
+
+class EchoSection(ProcessSection):
+    def __init__(self, batch_size=1, shared_memory_size=0, shared_memory_threshold=64 * 1024,
+                 worker_pool=None) -> None:
+        self.batch_size = batch_size
+        self.shared_memory_size = shared_memory_size
+        self.shared_memory_threshold = shared_memory_threshold
+        self.worker_pool = worker_pool
+
+    def refine(self, input, output):
+        for item in input:
+            output(item)
+
+class TakeSection(ProcessSection):
+    def __init__(self, count, worker_pool=None) -> None:
+        self.count = count
+        self.worker_pool = worker_pool
+
+    def refine(self, input, output):
+        for i, item in enumerate(input):
+            output(item)
+            if i + 1 == self.count:
+                return
+
+class PoolSquares(ProcessPoolSection):
+    def __init__(self, workers, ordered=True, distribution='round_robin', worker_pool=None,
+                 max_pending=None) -> None:
+        self.workers = workers
+        self.ordered = ordered
+        self.distribution = distribution
+        self.worker_pool = worker_pool
+        self.max_pending = max_pending
+
+    def refine(self, input, output):
+        for item in input:
+            time.sleep((item % 3) * 0.005)
+            output(item * item)
@@ -1,7 +1,12 @@
+import math
+import statistics
+
+import pytest
 import trio
 
 from slurry import Pipeline
-from slurry.sections import Window, Group, Delay
+from slurry.sections import Window, WindowView, HoppingWindow, TumblingWindow, Group, KeyedGroup, Delay
+from slurry.sections import aggregators
 
 async def test_window(produce_increasing_integers, autojump_clock):
     async with Pipeline.create(
@@ -10,6 +15,108 @@ async def test_window(produce_increasing_integers, autojump_clock):
         result = [item async for item in aiter]
         assert result == [(0,), (0, 1), (0, 1, 2), (1, 2, 3), (2, 3, 4)]
 
+@pytest.mark.parametrize('aggregate,reference', [
+    (aggregators.Count, len),
+    (aggregators.Sum, sum),
+    (aggregators.Mean, statistics.mean),
+    (aggregators.Variance, statistics.pvariance),
+    (aggregators.Min, min),
+    (aggregators.Max, max),
+    (lambda: aggregators.Invertible(lambda a, b: a * b, lambda a, b: a // b, 1), math.prod),
+    (lambda: aggregators.Associative(math.gcd), lambda window: math.gcd(*window)),
+])
+async def test_window_aggregate(aggregate, reference):
+    values = [3, 1, 4, 1, 5, 9, 2, 6, 5, 3, 5, 8, 9, 7, 9, 3, 2, 3, 8, 4, 6]
+
+    async def produce():
+        for value in values:
+            yield value
+
+    async with Pipeline.create(
+        Window(4, produce(), aggregate=aggregate)
+    ) as pipeline, pipeline.tap() as aiter:
+        result = [item async for item in aiter]
+    expected = [reference(values[max(0, i - 3):i + 1]) for i in range(len(values))]
+    assert result == pytest.approx(expected)
+
+async def test_window_aggregate_max_age(produce_increasing_integers, autojump_clock):
+    async with Pipeline.create(
+        Window(10, produce_increasing_integers(1, max=5), max_age=1.5, aggregate=aggregators.Sum)
+    ) as pipeline, pipeline.tap() as aiter:
+        result = [item async for item in aiter]
+        assert result == [0, 1, 3, 5, 7]
+
+async def test_window_view_retained(produce_increasing_integers, autojump_clock):
+    async with Pipeline.create(
+        Window(3, produce_increasing_integers(1, max=10), view=True)
+    ) as pipeline, pipeline.tap() as aiter:
+        views = [item async for item in aiter]
+    assert all(isinstance(view, WindowView) for view in views)
+    assert [tuple(view) for view in views] == [
+        (0,), (0, 1), (0, 1, 2), (1, 2, 3), (2, 3, 4), (3, 4, 5), (4, 5, 6), (5, 6, 7), (6, 7, 8),
+        (7, 8, 9)
+    ]
+
+async def test_window_view_sequence(autojump_clock):
+    async def produce():
+        for value in range(8):
+            yield float(value)
+
+    async with Pipeline.create(
+        Window(5, produce(), view=True, typecode='d')
+    ) as pipeline, pipeline.tap() as aiter:
+        views = [item async for item in aiter]
+    view = views[-1]
+    assert len(view) == 5
+    assert view[0] == 3.0 and view[-1] == 7.0
+    assert view[1:4].copy() == (4.0, 5.0, 6.0)
+    assert view[1:4][1:].copy() == (5.0, 6.0)
+    assert view[::2] == (3.0, 5.0, 7.0)
+    assert 6.0 in view
+    assert view.index(5.0) == 2
+    with pytest.raises(IndexError):
+        view[5]
+
+def test_window_view_invalid_arguments():
+    with pytest.raises(ValueError):
+        Window(3, view=True, aggregate=aggregators.Sum)
+    with pytest.raises(ValueError):
+        Window(math.inf, max_age=1, view=True)
+    with pytest.raises(ValueError):
+        Window(3, typecode='d')
+
+async def test_tumbling_window_processing_time(produce_increasing_integers, autojump_clock):
+    async with Pipeline.create(
+        TumblingWindow(2, produce_increasing_integers(1, max=5), clock=trio.current_time)
+    ) as pipeline, pipeline.tap() as aiter:
+        result = [(end - start, items) async for start, end, items in aiter]
+        assert [items for _, items in result] == [(0, 1), (2, 3), (4,)]
+        assert all(length == 2 for length, _ in result)
+
+async def test_tumbling_window_event_time():
+    async def produce():
+        for timestamp in [1, 3, 12, 2, 15, 21, 14, 9, 35]:
+            yield timestamp
+
+    window = TumblingWindow(10, produce(), timestamp=lambda item: item, allowed_lateness=5,
+                            reducer=sum)
+    async with Pipeline.create(window) as pipeline, pipeline.tap() as aiter:
+        result = [item async for item in aiter]
+    assert result == [(0, 10, 6), (10, 20, 41), (20, 30, 21), (30, 40, 35)]
+    assert window.late_items == 1
+
+async def test_hopping_window_event_time():
+    async def produce():
+        for timestamp in [0, 1, 2, 3, 4, 5]:
+            yield timestamp
+
+    async with Pipeline.create(
+        HoppingWindow(4, 2, produce(), offset=1, timestamp=lambda item: item)
+    ) as pipeline, pipeline.tap() as aiter:
+        result = [item async for item in aiter]
+    assert result == [(-3, 1, (0,)), (-1, 3, (0, 1, 2)), (1, 5, (1, 2, 3, 4)), (3, 7, (3, 4, 5)),
+                      (5, 9, (5,))]
+
 async def test_group_max_size(produce_increasing_integers, autojump_clock):
     async with Pipeline.create(
         Group(2.5, produce_increasing_integers(1, max=5), max_size=3)
@@ -24,6 +131,59 @@ async def test_group_timeout(spam_wait_spam_integers, autojump_clock):
         result = [item async for item in aiter]
         assert result == [(0, 1, 2, 3, 4), (0, 1, 2, 3, 4)]
 
+async def test_group_fold(spam_wait_spam_integers, autojump_clock):
+    async with Pipeline.create(
+        Group(2.5, spam_wait_spam_integers(5), fold=lambda total, item: total + item, initial=0)
+    ) as pipeline, pipeline.tap() as aiter:
+        result = [item async for item in aiter]
+        assert result == [10, 10]
+
+async def test_group_fold_max_size(produce_increasing_integers, autojump_clock):
+    def fold(accumulator, item):
+        accumulator[item % 2] += 1
+        return accumulator
+
+    async with Pipeline.create(
+        Group(2.5, produce_increasing_integers(1, max=5), max_size=3, mapper=lambda item: item * 3,
+              fold=fold, initial={0: 0, 1: 0})
+    ) as pipeline, pipeline.tap() as aiter:
+        result = [item async for item in aiter]
+        assert result == [{0: 2, 1: 1}, {0: 1, 1: 1}]
+
+def test_group_fold_and_reducer():
+    with pytest.raises(ValueError):
+        Group(1, fold=max, reducer=max)
+
+async def test_keyed_group(produce_increasing_integers, autojump_clock):
+    async with Pipeline.create(
+        KeyedGroup(3.5, lambda item: item % 3, produce_increasing_integers(1, max=10), max_size=2)
+    ) as pipeline, pipeline.tap() as aiter:
+        result = [item async for item in aiter]
+        assert result == [(0, (0, 3)), (1, (1, 4)), (2, (2, 5)), (0, (6, 9)), (1, (7,)), (2, (8,))]
+
+async def test_keyed_group_max_keys(produce_increasing_integers, autojump_clock):
+    async with Pipeline.create(
+        KeyedGroup(10, lambda item: item % 3, produce_increasing_integers(1, max=6), max_keys=2,
+                   fold=lambda total, item: total + item, initial=0)
+    ) as pipeline, pipeline.tap() as aiter:
+        result = [item async for item in aiter]
+        assert result == [(0, 0), (1, 1), (2, 2), (0, 3), (1, 4), (2, 5)]
+
+async def test_keyed_group_many_keys(autojump_clock):
+    async def produce():
+        for i in range(10_000):
+            yield i
+        await trio.sleep(1)
+        yield 1
+
+    async with Pipeline.create(
+        KeyedGroup(0.5, lambda item: item % 1000, produce(), reducer=len)
+    ) as pipeline, pipeline.tap() as aiter:
+        result = [item async for item in aiter]
+        assert len(result) == 1001
+        assert all(size == 10 for _, size in result[:1000])
+        assert result[-1] == (1, 1)
+
 async def test_delay(autojump_clock):
     async def timestamp():
         yield trio.current_time()
@@ -32,4 +192,48 @@ async def test_delay(autojump_clock):
         Delay(1, timestamp())
     ) as pipeline, pipeline.tap() as aiter:
             async for item in aiter:
-                assert trio.current_time() - item == 1
\ No newline at end of file
+                assert trio.current_time() - item == 1
+
+async def test_delay_variable_interval(autojump_clock):
+    async def produce():
+        for delay in [3, 1, 2, 1]:
+            yield delay
+
+    async with Pipeline.create(
+        Delay(lambda item: item, produce())
+    ) as pipeline, pipeline.tap() as aiter:
+        start = trio.current_time()
+        result = [(item, trio.current_time() - start) async for item in aiter]
+        assert result == [(1, 1), (1, 1), (2, 2), (3, 3)]
+
+async def test_delay_drop_newest(autojump_clock):
+    async def produce():
+        for i in range(10):
+            yield i
+
+    delay = Delay(1, produce(), max_buffer=3, overflow='drop_newest')
+    async with Pipeline.create(delay) as pipeline, pipeline.tap() as aiter:
+        result = [item async for item in aiter]
+        assert result == [0, 1, 2]
+        assert delay.dropped == 7
+
+async def test_delay_block(autojump_clock):
+    received = []
+
+    async def produce():
+        for i in range(6):
+            received.append(trio.current_time())
+            yield i
+
+    async with Pipeline.create(
+        Delay(1, produce(), max_buffer=2)
+    ) as pipeline, pipeline.tap() as aiter:
+        result = [item async for item in aiter]
+        assert result == [0, 1, 2, 3, 4, 5]
+        assert max(received) - min(received) >= 2
+
+def test_delay_invalid_arguments():
+    with pytest.raises(ValueError):
+        Delay(1, max_buffer=0)
+    with pytest.raises(ValueError):
+        Delay(1, overflow='drop_oldest')
@@ -1,3 +1,6 @@
+import pytest
+import trio
+
 from slurry import Pipeline
 from slurry.sections import Chain, Merge, Zip, ZipLatest, Repeat, Map, Skip
 
@@ -41,6 +44,52 @@ async def test_merge_pipeline_section(produce_increasing_integers, autojump_cloc
                 break
     assert result == ['ax', 0, 'ax', 1, 'ax', 2]
 
+async def produce_bulk_and_control(policy, **kwargs):
+    async def bulk():
+        for i in range(12):
+            yield i
+
+    async def control():
+        for item in 'ab':
+            await trio.sleep(2.3)
+            yield item
+
+    merge = Merge(bulk(), control(), policy=policy, **kwargs)
+    async with Pipeline.create(merge) as pipeline, pipeline.tap() as aiter:
+        result = []
+        async for item in aiter:
+            result.append(item)
+            await trio.sleep(1)
+    return result, merge.statistics()
+
+async def test_merge_priority(autojump_clock):
+    race, _ = await produce_bulk_and_control('race')
+    priority, statistics = await produce_bulk_and_control('priority', weights=[1, 2],
+                                                          buffer_size=4)
+    assert sorted(priority, key=str) == sorted(race, key=str)
+    assert priority.index('b') < race.index('b')
+    assert [latency['count'] for latency in statistics] == [12, 2]
+    assert statistics[1]['max'] < statistics[0]['max']
+
+async def test_merge_weighted(autojump_clock):
+    async def produce(name):
+        for i in range(6):
+            yield name
+
+    async with Pipeline.create(
+        Merge(produce('a'), produce('b'), policy='weighted', weights=[2, 1])
+    ) as pipeline, pipeline.tap() as aiter:
+        result = [item async for item in aiter]
+        assert ''.join(result[:6]) in ('aabaab', 'abaaba', 'baabaa')
+
+def test_merge_invalid_arguments():
+    with pytest.raises(ValueError):
+        Merge(policy='fair')
+    with pytest.raises(ValueError):
+        Merge(Repeat(1), weights=[1, 2])
+    with pytest.raises(ValueError):
+        Merge(Repeat(1), policy='weighted', weights=[0.5])
+
 async def test_zip(produce_increasing_integers, produce_alphabet, autojump_clock):
     async with Pipeline.create(
         Zip(produce_increasing_integers(1), produce_alphabet(0.9))
@@ -49,6 +98,30 @@ async def test_zip(produce_increasing_integers, produce_alphabet, autojump_clock
             results = [item async for item in aiter]
             assert results == [(0,'a'), (1, 'b'), (2, 'c')]
 
+async def test_zip_many_sources(produce_increasing_integers, autojump_clock):
+    async with Pipeline.create(
+        Zip(*(produce_increasing_integers(0.1 * i, max=4 + i) for i in range(10)), buffer_size=3)
+    ) as pipeline, pipeline.tap() as aiter:
+        results = [item async for item in aiter]
+        assert results == [(i,) * 10 for i in range(4)]
+
+@pytest.mark.parametrize('delay', [0, 1])
+async def test_zip_stops_when_later_source_ends(delay, autojump_clock):
+    async def slow_forever():
+        await trio.sleep(delay)
+        yield 'a'
+        await trio.sleep_forever()
+
+    async def short():
+        yield 0
+
+    with trio.fail_after(10):
+        async with Pipeline.create(
+            Zip(slow_forever(), short())
+        ) as pipeline, pipeline.tap() as aiter:
+            results = [item async for item in aiter]
+    assert results == [('a', 0)]
+
 async def test_zip_pipeline_section(produce_increasing_integers, produce_alphabet, autojump_clock):
     async with Pipeline.create(
         Zip(
@@ -73,6 +146,42 @@ async def test_zip_latest(produce_increasing_integers, produce_alphabet, autojum
         result = [item async for item in aiter]
         assert result == [(0, None),  (0, 'a'), (1, 'a'), (1, 'b'), (2, 'b')]
 
+async def test_zip_latest_interval(produce_increasing_integers, produce_alphabet, autojump_clock):
+    async with Pipeline.create(
+        ZipLatest(
+            produce_increasing_integers(0.1, max=10),
+            produce_alphabet(0.1, max=10, delay=0.05),
+            interval=0.32)
+    ) as pipeline, pipeline.tap() as aiter:
+        result = [item async for item in aiter]
+        assert result == [(0, None), (3, 'c'), (6, 'f'), (9, 'i')]
+
+@pytest.mark.parametrize('delta', [False, True])
+async def test_zip_latest_interval_slow_consumer(delta, autojump_clock):
+    async def produce():
+        for i in range(50):
+            yield i
+            await trio.sleep(0.01)
+
+    async with Pipeline.create(
+        ZipLatest(produce(), interval=0, delta=delta)
+    ) as pipeline, pipeline.tap() as aiter:
+        result = []
+        async for item in aiter:
+            result.append(item)
+            await trio.sleep(0.1)
+    assert result[-1] == ({0: 49} if delta else (49,))
+
+async def test_zip_latest_delta(produce_increasing_integers, produce_alphabet, autojump_clock):
+    async with Pipeline.create(
+        ZipLatest(
+            produce_increasing_integers(1, max=3),
+            produce_alphabet(1.3, max=3, delay=0.5),
+            delta=True)
+    ) as pipeline, pipeline.tap() as aiter:
+        result = [item async for item in aiter]
+        assert result == [{0: 0}, {1: 'a'}, {0: 1}, {1: 'b'}, {0: 2}]
+
 async def test_zip_latest_pipeline_section(produce_increasing_integers, produce_alphabet, autojump_clock):
     async with Pipeline.create(
         ZipLatest(
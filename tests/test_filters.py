@@ -1,5 +1,8 @@
+import pytest
+import trio
+
 from slurry import Pipeline
-from slurry.sections import Merge, RateLimit, Skip, SkipWhile, Filter, Changes
+from slurry.sections import Merge, RateLimit, Skip, SkipWhile, Filter, Changes, Distinct, Map
 
 from .fixtures import AsyncNonIteratorIterable
 
@@ -69,3 +72,116 @@ async def test_ratelimit_callable_subject(produce_mappings, autojump_clock):
     ) as pipeline, pipeline.tap() as aiter:
         result = [item['number'] async for item in aiter]
         assert result == [0,1,3,4,6,7,8]
+
+async def test_ratelimit_burst(produce_increasing_integers, autojump_clock):
+    async with Pipeline.create(
+        RateLimit(1, produce_increasing_integers(0.25, max=8), burst=3)
+    ) as pipeline, pipeline.tap() as aiter:
+        result = [item async for item in aiter]
+        assert result == [0, 1, 2, 5]
+
+async def test_ratelimit_throttle(produce_increasing_integers, autojump_clock):
+    async with Pipeline.create(
+        RateLimit(1, produce_increasing_integers(0.1, max=5), throttle=True)
+    ) as pipeline, pipeline.tap() as aiter:
+        start = trio.current_time()
+        result = [(item, trio.current_time() - start) async for item in aiter]
+        assert result == [(0, 0), (1, 1), (2, 2), (3, 3), (4, 4)]
+
+async def test_ratelimit_throttle_per_subject(autojump_clock):
+    async def produce():
+        for item in 'aaaaab':
+            yield item
+
+    async with Pipeline.create(
+        RateLimit(1, produce(), subject=lambda item: item, throttle=True)
+    ) as pipeline, pipeline.tap() as aiter:
+        start = trio.current_time()
+        result = [(item, trio.current_time() - start) async for item in aiter]
+        assert result == [('a', 0), ('b', 0), ('a', 1), ('a', 2), ('a', 3), ('a', 4)]
+
+async def test_ratelimit_throttle_max_buffer(autojump_clock):
+    produced = 0
+
+    async def produce():
+        nonlocal produced
+        for i in range(5):
+            produced += 1
+            yield i
+
+    async with Pipeline.create(
+        RateLimit(1, produce(), throttle=True, max_buffer=1)
+    ) as pipeline, pipeline.tap() as aiter:
+        start = trio.current_time()
+        result = []
+        async for item in aiter:
+            result.append((item, trio.current_time() - start))
+            # The buffered item, plus the items held by the pull task and the tap.
+            assert produced - len(result) <= 3
+        assert result == [(0, 0), (1, 1), (2, 2), (3, 3), (4, 4)]
+
+    with pytest.raises(ValueError):
+        RateLimit(1, throttle=True, max_buffer=0)
+
+async def test_ratelimit_max_subjects(produce_mappings, autojump_clock):
+    async with Pipeline.create(
+        RateLimit(1, produce_mappings(0.5), subject='vehicle', max_subjects=1)
+    ) as pipeline, pipeline.tap() as aiter:
+        result = [item['number'] async for item in aiter]
+        assert result == [0, 1, 2, 3, 4, 6, 7, 8]
+
+@pytest.mark.parametrize('backend', ['lru', 'bloom'])
+async def test_distinct(backend):
+    async def produce():
+        for item in [1, 2, 1, 3, 2, 4, 1, 5]:
+            yield item
+
+    async with Pipeline.create(
+        Distinct(produce(), backend=backend)
+    ) as pipeline, pipeline.tap() as aiter:
+        result = [item async for item in aiter]
+        assert result == [1, 2, 3, 4, 5]
+
+async def test_distinct_lru_max_size_and_key():
+    async def produce():
+        for item in ['a', 'B', 'b', 'c', 'A', 'C']:
+            yield item
+
+    async with Pipeline.create(
+        produce(), Map(lambda item: item), Distinct(key=str.lower, max_size=2)
+    ) as pipeline, pipeline.tap() as aiter:
+        result = [item async for item in aiter]
+        assert result == ['a', 'B', 'c', 'A']
+
+async def test_distinct_ttl(produce_increasing_integers, autojump_clock):
+    async with Pipeline.create(
+        Distinct(produce_increasing_integers(1, max=8), key=lambda item: item % 3, ttl=3.5)
+    ) as pipeline, pipeline.tap() as aiter:
+        result = [item async for item in aiter]
+        assert result == [0, 1, 2]
+
+async def test_distinct_ttl_expired(produce_increasing_integers, autojump_clock):
+    async with Pipeline.create(
+        Distinct(produce_increasing_integers(1, max=8), key=lambda item: item % 3, ttl=2.5)
+    ) as pipeline, pipeline.tap() as aiter:
+        result = [item async for item in aiter]
+        assert result == list(range(8))
+
+async def test_distinct_bloom_false_positive_rate():
+    async def produce():
+        for item in range(20_000):
+            yield item
+
+    async with Pipeline.create(
+        Distinct(produce(), backend='bloom', max_size=10_000, false_positive_rate=0.01)
+    ) as pipeline, pipeline.tap() as aiter:
+        result = [item async for item in aiter]
+        assert 20_000 * 0.98 < len(result) <= 20_000
+
+def test_distinct_invalid_arguments():
+    with pytest.raises(ValueError):
+        Distinct(backend='cuckoo')
+    with pytest.raises(ValueError):
+        Distinct(max_size=0)
+    with pytest.raises(ValueError):
+        Distinct(false_positive_rate=1)
@@ -1,7 +1,15 @@
 
+import array
+import threading
+import time
+
+import pytest
+import trio
+
 from slurry import Pipeline
+from slurry.environments import WorkerPool
 
-from .fixtures import SimpleProcessSection, FibonacciSection
+from .fixtures import SimpleProcessSection, FibonacciSection, SlowEchoSection, EchoSection, PoolSquares, TakeSection
 
 async def test_simple_process_section():
     value = 'hello, world!'
@@ -15,3 +23,230 @@ async def test_fibonacci_section():
         results = [i async for i in aiter]
         assert len(results) == 20
         assert results[-1] == 4181
+
+async def test_process_section_backpressure():
+    produced = 0
+
+    async def producer():
+        nonlocal produced
+        for i in range(50):
+            produced += 1
+            yield i
+
+    async with Pipeline.create(
+        producer(),
+        SlowEchoSection(0.01, max_input_in_flight=4, max_output_in_flight=2)
+    ) as pipeline, pipeline.tap() as aiter:
+        results = []
+        async for i in aiter:
+            results.append(i)
+            # Credits in each direction, plus items held by the tap, the section pump and the
+            # producer itself.
+            assert produced - len(results) <= 4 + 2 + 4
+        assert results == list(range(50))
+
+async def test_process_section_batching():
+    async def producer():
+        for i in range(1000):
+            yield i
+
+    async with Pipeline.create(producer(), EchoSection(batch_size=64)) as pipeline, pipeline.tap() as aiter:
+        results = [i async for i in aiter]
+        assert results == list(range(1000))
+
+async def test_process_section_batching_slow_input(produce_increasing_integers):
+    async with Pipeline.create(
+        produce_increasing_integers(0.01, max=5),
+        EchoSection(batch_size=64)
+    ) as pipeline, pipeline.tap() as aiter:
+        results = [i async for i in aiter]
+        assert results == list(range(5))
+
+async def test_process_section_shared_memory():
+    items = [bytes([i]) * 3000 for i in range(20)]
+    items += [bytearray(b'x' * 2000), memoryview(array.array('d', range(500))), b'small', 'text']
+    items.append(('mixed', b'y' * 5000, array.array('i', range(1000))))
+
+    async def producer():
+        for item in items:
+            yield item
+
+    # The ring is smaller than the total payload, so space is recycled.
+    async with Pipeline.create(
+        producer(),
+        EchoSection(batch_size=4, shared_memory_size=10_000, shared_memory_threshold=1000)
+    ) as pipeline, pipeline.tap() as aiter:
+        results = [i async for i in aiter]
+    assert results[:20] == items[:20]
+    assert all(type(result) is bytes for result in results[:20])
+    assert type(results[20]) is bytearray and results[20] == items[20]
+    assert results[21].format == 'd' and results[21].tolist() == list(range(500))
+    assert results[22:] == items[22:]
+
+async def test_process_section_many_sections():
+    # More sections than tokens in Trio's default thread limiter.
+    async def producer():
+        for i in range(20):
+            yield i
+
+    with trio.fail_after(60):
+        async with Pipeline.create(
+            producer(), *(EchoSection() for _ in range(24))
+        ) as pipeline, pipeline.tap() as aiter:
+            results = [i async for i in aiter]
+    assert results == list(range(20))
+
+@pytest.mark.parametrize('section', [EchoSection, lambda: PoolSquares(2)])
+async def test_process_section_early_close_stops_threads(section):
+    async def producer():
+        i = 0
+        while True:
+            yield i
+            i += 1
+
+    def transport_threads():
+        return sum(thread.name.startswith(('reader from ', 'writer from '))
+                   for thread in threading.enumerate())
+
+    for _ in range(5):
+        async with Pipeline.create(producer(), section()) as pipeline, pipeline.tap() as aiter:
+            async for item in aiter:
+                if item == 9:
+                    break
+    with trio.fail_after(5):
+        while transport_threads():
+            await trio.sleep(0.05)
+
+async def test_process_pool_section_ordered():
+    async def producer():
+        for i in range(40):
+            yield i
+
+    async with Pipeline.create(producer(), PoolSquares(4)) as pipeline, pipeline.tap() as aiter:
+        results = [i async for i in aiter]
+        assert results == [i * i for i in range(40)]
+
+async def test_process_pool_section_unordered():
+    async def producer():
+        for i in range(40):
+            yield i
+
+    async with Pipeline.create(
+        producer(),
+        PoolSquares(4, ordered=False, distribution='least_loaded')
+    ) as pipeline, pipeline.tap() as aiter:
+        results = [i async for i in aiter]
+        assert sorted(results) == [i * i for i in range(40)]
+
+async def test_process_pool_section_many_workers():
+    # More workers than tokens in Trio's default thread limiter.
+    async def producer():
+        for i in range(100):
+            yield i
+
+    with trio.fail_after(60):
+        async with Pipeline.create(producer(), PoolSquares(24)) as pipeline, \
+                pipeline.tap() as aiter:
+            results = [i async for i in aiter]
+    assert results == [i * i for i in range(100)]
+
+@pytest.mark.parametrize('ordered', [True, False])
+async def test_process_pool_section_idle_source(ordered):
+    async def producer():
+        for i in range(3):
+            yield i
+        await trio.sleep_forever()
+
+    results = []
+    with trio.fail_after(10):
+        async with Pipeline.create(
+            producer(), PoolSquares(2, ordered=ordered)
+        ) as pipeline, pipeline.tap() as aiter:
+            async for item in aiter:
+                results.append(item)
+                if len(results) == 3:
+                    break
+    assert sorted(results) == [0, 1, 4]
+
+@pytest.mark.parametrize('ordered', [True, False])
+@pytest.mark.parametrize('max_pending', [1, 2])
+async def test_process_pool_section_small_max_pending(ordered, max_pending):
+    async def producer():
+        for i in range(10):
+            yield i
+
+    with trio.fail_after(10):
+        async with Pipeline.create(
+            producer(), PoolSquares(2, ordered=ordered, max_pending=max_pending)
+        ) as pipeline, pipeline.tap() as aiter:
+            results = [i async for i in aiter]
+    if ordered:
+        assert results == [i * i for i in range(10)]
+    else:
+        assert sorted(results) == [i * i for i in range(10)]
+
+async def test_worker_pool_reuses_workers():
+    async def producer():
+        for i in range(10):
+            yield i
+
+    with WorkerPool(1) as pool:
+        for _ in range(3):
+            async with Pipeline.create(
+                producer(),
+                EchoSection(batch_size=4, worker_pool=pool)
+            ) as pipeline, pipeline.tap() as aiter:
+                assert [i async for i in aiter] == list(range(10))
+        statistics = pool.statistics()
+    assert statistics['started'] == 1
+    assert statistics['replaced'] == 0
+    assert statistics['idle'] == 1
+    assert statistics['startup_latency']['count'] == 1
+
+async def test_worker_pool_startup_latency_excludes_idle_time():
+    async def producer():
+        for i in range(3):
+            yield i
+
+    with WorkerPool(1) as pool:
+        await trio.to_thread.run_sync(time.sleep, 1)
+        async with Pipeline.create(
+            producer(),
+            EchoSection(worker_pool=pool)
+        ) as pipeline, pipeline.tap() as aiter:
+            assert [i async for i in aiter] == [0, 1, 2]
+        statistics = pool.statistics()
+    assert statistics['startup_latency']['count'] == 1
+    assert statistics['startup_latency']['mean'] < 1
+
+async def test_worker_pool_refine_returns_early():
+    async def producer():
+        i = 0
+        while True:
+            yield i
+            i += 1
+
+    with WorkerPool(1) as pool:
+        for _ in range(2):
+            async with Pipeline.create(
+                producer(),
+                TakeSection(3, worker_pool=pool)
+            ) as pipeline, pipeline.tap() as aiter:
+                assert [i async for i in aiter] == [0, 1, 2]
+        statistics = pool.statistics()
+    assert statistics['started'] == 1
+    assert statistics['replaced'] == 0
+
+async def test_worker_pool_process_pool_section():
+    async def producer():
+        for i in range(20):
+            yield i
+
+    with WorkerPool(2) as pool:
+        for _ in range(2):
+            async with Pipeline.create(
+                producer(),
+                PoolSquares(2, worker_pool=pool)
+            ) as pipeline, pipeline.tap() as aiter:
+                assert [i async for i in aiter] == [i * i for i in range(20)]
+        assert pool.statistics()['started'] == 2
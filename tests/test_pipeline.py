@@ -2,7 +2,9 @@ import pytest
 import trio
 
 from slurry import Pipeline
-from slurry.sections import Map
+from slurry.sections import Map, Filter, Skip, SkipWhile, Changes
+from slurry.sections.abc import Fusable
+from slurry.sections.weld import Transport, weld
 from slurry.environments import TrioSection
 
 async def test_pipeline_create(autojump_clock):
@@ -61,3 +63,159 @@ async def test_welding_two_generator_functions_not_allowed(produce_increasing_in
             produce_increasing_integers(1),
         ) as pipeline, pipeline.tap() as aiter:
             result = [i async for i in aiter]
+
+async def test_multiple_taps(produce_increasing_integers, autojump_clock):
+    async with Pipeline.create(produce_increasing_integers(1, max=5)) as pipeline:
+        async with pipeline.tap() as aiter1, pipeline.tap() as aiter2:
+            results = [], []
+            async def consume(aiter, result):
+                async for i in aiter:
+                    result.append(i)
+            async with trio.open_nursery() as nursery:
+                nursery.start_soon(consume, aiter1, results[0])
+                nursery.start_soon(consume, aiter2, results[1])
+            assert results == ([0, 1, 2, 3, 4], [0, 1, 2, 3, 4])
+
+async def test_closed_tap_does_not_stop_other_taps(produce_increasing_integers, autojump_clock):
+    async with Pipeline.create(produce_increasing_integers(1, max=5)) as pipeline:
+        closing = pipeline.tap()
+        async with pipeline.tap() as aiter:
+            async with closing:
+                assert await closing.receive() == 0
+            result = [i async for i in aiter]
+            assert result == [0, 1, 2, 3, 4]
+
+async def test_tap_overflow_latest(produce_increasing_integers, autojump_clock):
+    async with Pipeline.create(produce_increasing_integers(1, max=10)) as pipeline:
+        slow = pipeline.tap(overflow='latest')
+        async with pipeline.tap() as fast:
+            results = [], []
+            async def consume(aiter, result, delay):
+                async with aiter:
+                    async for i in aiter:
+                        result.append(i)
+                        await trio.sleep(delay)
+            async with trio.open_nursery() as nursery:
+                nursery.start_soon(consume, fast, results[0], 0)
+                nursery.start_soon(consume, slow, results[1], 2.4)
+            assert results[0] == list(range(10))
+            assert results[1] == [0, 1, 2, 4, 7, 9]
+            assert pipeline.dropped(slow) == 4
+
+async def test_tap_overflow_drop_newest(produce_increasing_integers, autojump_clock):
+    async with Pipeline.create(produce_increasing_integers(1, max=10)) as pipeline:
+        async with pipeline.tap(overflow='drop_newest', queue_size=2) as aiter:
+            result = []
+            async for i in aiter:
+                result.append(i)
+                await trio.sleep(2.4)
+            assert result == [0, 1, 2, 3, 4, 5, 8]
+            assert pipeline.dropped(aiter) == 3
+
+async def test_tap_invalid_overflow():
+    async with Pipeline.create(None) as pipeline:
+        with pytest.raises(ValueError):
+            pipeline.tap(overflow='sometimes')
+
+async def test_metrics(produce_increasing_integers, autojump_clock):
+    async def slow_consumer(aiter):
+        async for _ in aiter:
+            await trio.sleep(5)
+
+    async with Pipeline.create(
+        produce_increasing_integers(1, max=5),
+        Map(lambda i: i + 1),
+        metrics=True
+    ) as pipeline:
+        async with pipeline.tap() as aiter:
+            await slow_consumer(aiter)
+        snapshot = pipeline.metrics()
+    section, = snapshot['sections']
+    assert section['name'] == 'Map'
+    assert section['items_in'] == 5
+    assert section['items_out'] == 5
+    assert section['latency']['count'] == 5
+    assert section['input_wait'] > 0
+    assert section['output_blocked'] > 0
+
+async def test_metrics_disabled():
+    async with Pipeline.create(None) as pipeline:
+        with pytest.raises(RuntimeError):
+            pipeline.metrics()
+
+async def test_fusion(produce_increasing_integers, autojump_clock):
+    sections = (
+        Map(lambda i: i // 2),
+        Changes(),
+        SkipWhile(lambda i: i < 1),
+        Filter(lambda i: i % 2),
+        Map(lambda i: i * 10),
+        Skip(1),
+    )
+    results = []
+    for fuse in (True, False):
+        async with trio.open_nursery() as nursery:
+            output = weld(nursery, produce_increasing_integers(1, max=20), *sections, fuse=fuse)
+            results.append([i async for i in output])
+    assert results[0] == results[1] == [30, 50, 70, 90]
+
+async def test_fusion_metrics(produce_increasing_integers, autojump_clock):
+    class Double(TrioSection, Fusable):
+        async def refine(self, input, output):
+            async for item in input:
+                await output(item * 2)
+
+        def fuse(self):
+            return lambda item: item * 2
+
+    async with Pipeline.create(
+        produce_increasing_integers(1),
+        Map(lambda i: i + 1),
+        Double(),
+        metrics=True
+    ) as pipeline, pipeline.tap() as aiter:
+        result = [i async for i in aiter]
+        assert result == [2, 4, 6]
+        assert [section['name'] for section in pipeline.metrics()['sections']] == ['Map+Double']
+
+async def test_buffered_transport(produce_increasing_integers, autojump_clock):
+    async with Pipeline.create(
+        produce_increasing_integers(1, max=5),
+        Map(lambda i: i + 1),
+        Map(lambda i: i * 2),
+        transport=Transport(4)
+    ) as pipeline, pipeline.tap() as aiter:
+        result = [i async for i in aiter]
+        assert result == [2, 4, 6, 8, 10]
+
+async def test_batched_transport(autojump_clock):
+    class Burst(TrioSection):
+        async def refine(self, input, output):
+            for i in range(10):
+                await output(i)
+            await trio.sleep(5)
+            await output(10)
+            await trio.sleep(5)
+
+    async with Pipeline.create(
+        Burst(),
+        Map(lambda i: (i, trio.current_time())),
+        Filter(lambda item: True),
+        transport=Transport(batch_size=4, batch_latency=1)
+    ) as pipeline, pipeline.tap() as aiter:
+        result = [item async for item in aiter]
+        assert [i for i, _ in result] == list(range(11))
+        assert [t for _, t in result] == [0] * 8 + [1, 1, 6]
+
+async def test_section_transport(produce_increasing_integers, autojump_clock):
+    section = Map(lambda i: i + 1)
+    section.transport = Transport(batch_size=2)
+    async with Pipeline.create(
+        produce_increasing_integers(1, max=5),
+        section,
+        Map(lambda i: i * 2),
+        metrics=True
+    ) as pipeline, pipeline.tap() as aiter:
+        result = [i async for i in aiter]
+        assert result == [2, 4, 6, 8, 10]
+        assert [s['name'] for s in pipeline.metrics()['sections']] == ['Map', 'Map']
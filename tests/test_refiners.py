@@ -1,5 +1,9 @@
+import pytest
+import trio
+
 from slurry import Pipeline
-from slurry.sections import Map
+from slurry.environments import ThreadSection, ProcessSection
+from slurry.sections import Map, ConcurrentMap, BatchMap
 
 async def test_map(produce_increasing_integers, autojump_clock):
     async with Pipeline.create(
@@ -7,3 +11,81 @@ async def test_map(produce_increasing_integers, autojump_clock):
     ) as pipeline, pipeline.tap() as aiter:
         result = [i async for i in aiter]
         assert result == [0, 1, 4, 9, 16]
+
+async def slow_square(x):
+    await trio.sleep(3 - x % 3)
+    return x * x
+
+async def test_concurrent_map_ordered(produce_increasing_integers, autojump_clock):
+    async with Pipeline.create(
+        produce_increasing_integers(0, max=6),
+        ConcurrentMap(slow_square, 3)
+    ) as pipeline, pipeline.tap() as aiter:
+        start = trio.current_time()
+        result = [i async for i in aiter]
+        assert result == [0, 1, 4, 9, 16, 25]
+        # Two rounds of three items, each taking up to three seconds.
+        assert trio.current_time() - start == 6
+
+async def test_concurrent_map_unordered(produce_increasing_integers, autojump_clock):
+    async with Pipeline.create(
+        ConcurrentMap(slow_square, 3, ordered=False, source=produce_increasing_integers(0, max=3))
+    ) as pipeline, pipeline.tap() as aiter:
+        result = [i async for i in aiter]
+        assert result == [4, 1, 0]
+
+async def test_concurrent_map_backpressure(autojump_clock):
+    received = 0
+
+    async def producer():
+        nonlocal received
+        for i in range(20):
+            received += 1
+            yield i
+
+    async with Pipeline.create(producer(), ConcurrentMap(slow_square, 4)) as pipeline, \
+            pipeline.tap() as aiter:
+        count = 0
+        async for _ in aiter:
+            count += 1
+            await trio.sleep(10)
+            # Pending items, plus items held by the producer, the weld channel and the tap.
+            assert received - count <= 4 + 4
+
+def test_concurrent_map_invalid_concurrency():
+    with pytest.raises(ValueError):
+        ConcurrentMap(slow_square, 0)
+
+def double_all(batch):
+    return [x * 2 for x in batch]
+
+async def test_batch_map(produce_increasing_integers, autojump_clock):
+    batches = []
+
+    def record_batches(batch):
+        batches.append(batch)
+        return double_all(batch)
+
+    async with Pipeline.create(
+        produce_increasing_integers(1, max=10),
+        BatchMap(record_batches, 4, interval=2.5)
+    ) as pipeline, pipeline.tap() as aiter:
+        result = [i async for i in aiter]
+        assert result == [i * 2 for i in range(10)]
+    assert batches == [[0, 1, 2], [3, 4, 5], [6, 7, 8], [9]]
+
+@pytest.mark.parametrize('environment', [ThreadSection, ProcessSection])
+async def test_batch_map_environments(environment):
+    async def producer():
+        for i in range(100):
+            yield i
+
+    async with Pipeline.create(
+        BatchMap(double_all, 16, producer(), environment=environment)
+    ) as pipeline, pipeline.tap() as aiter:
+        result = [i async for i in aiter]
+        assert result == [i * 2 for i in range(100)]
+
+def test_batch_map_invalid_environment():
+    with pytest.raises(TypeError):
+        BatchMap(double_all, 16, environment=object)
@@ -2,7 +2,7 @@ import pytest
 from slurry import Pipeline
 from slurry.sections import Map
 
-from .fixtures import AsyncNonIteratorIterable, SyncSquares
+from .fixtures import AsyncNonIteratorIterable, SyncSquares, SlowDoubles
 
 async def test_thread_section(produce_increasing_integers, autojump_clock):
     async with Pipeline.create(
@@ -48,3 +48,62 @@ async def test_thread_section_section_input(produce_increasing_integers, autojum
     ) as pipeline, pipeline.tap() as aiter:
         result = [i async for i in aiter]
         assert result == [0, 1, 4]
+
+async def test_thread_section_chunked():
+    async def producer():
+        for i in range(1000):
+            yield i
+
+    async with Pipeline.create(producer(), SyncSquares(chunk_size=64)) as pipeline, \
+            pipeline.tap() as aiter:
+        result = [i async for i in aiter]
+        assert result == [i * i for i in range(1000)]
+
+async def test_thread_section_chunked_slow_input(produce_increasing_integers):
+    async with Pipeline.create(
+        produce_increasing_integers(0.01, max=5),
+        SyncSquares(chunk_size=64)
+    ) as pipeline, pipeline.tap() as aiter:
+        result = [i async for i in aiter]
+        assert result == [0, 1, 4, 9, 16]
+
+async def test_thread_section_chunked_exception(produce_increasing_integers):
+    with pytest.raises(RuntimeError):
+        async with Pipeline.create(
+            produce_increasing_integers(0.01, max=5),
+            SyncSquares(raise_after=4, chunk_size=64)
+        ) as pipeline, pipeline.tap() as aiter:
+            async for i in aiter:
+                pass
+
+async def test_thread_pool_section_ordered():
+    async def producer():
+        for i in range(30):
+            yield i
+
+    section = SlowDoubles(4)
+    async with Pipeline.create(producer(), section) as pipeline, pipeline.tap() as aiter:
+        result = []
+        async for i in aiter:
+            result.append(i)
+            assert section.in_flight <= 4
+            assert section.pending <= 8
+        assert result == [i * 2 for i in range(30)]
+    assert 1 < section.max_running <= 4
+
+async def test_thread_pool_section_unordered():
+    async def producer():
+        for i in range(30):
+            yield i
+
+    section = SlowDoubles(4, ordered=False)
+    async with Pipeline.create(producer(), section) as pipeline, pipeline.tap() as aiter:
+        result = [i async for i in aiter]
+        assert result != [i * 2 for i in range(30)]
+        assert sorted(result) == [i * 2 for i in range(30)]
+
+async def test_thread_pool_section_no_input():
+    with pytest.raises(RuntimeError):
+        async with Pipeline.create(SlowDoubles(4)) as pipeline, pipeline.tap() as aiter:
+            async for _ in aiter:
+                pass